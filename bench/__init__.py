@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The site generator modules live in src/ and import each other by name
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
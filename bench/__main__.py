@@ -0,0 +1,198 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import bench  # noqa: F401  (puts src/ on sys.path)
+from bench.corpus import SHAPES, generate_corpus, generate_static
+from utils import (
+    BlockType,
+    block_to_block_type,
+    copy_directory_recursive,
+    join_lines_without_prefix,
+    markdown_to_blocks,
+    markdown_to_html_node,
+    split_into_lines,
+    strip_heading_prefix,
+    strip_list_prefix,
+    strip_numbered_prefix,
+    sync_directory,
+    text_to_textnodes,
+)
+
+
+def inline_texts(block, block_type):
+    # The strings the block converters hand to text_to_textnodes
+    if block_type == BlockType.PARAGRAPH:
+        return [block]
+    if block_type == BlockType.HEADING:
+        return [strip_heading_prefix(block)]
+    if block_type == BlockType.QUOTE:
+        return [join_lines_without_prefix(split_into_lines(block), ">")]
+    if block_type == BlockType.UNORDERED_LIST:
+        return [strip_list_prefix(line) for line in split_into_lines(block)]
+    if block_type == BlockType.ORDERED_LIST:
+        return [strip_numbered_prefix(line) for line in split_into_lines(block)]
+    return []
+
+
+def best_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def run_stages(paths, static_dir, work_dir, repeat):
+    """
+    Time each build stage on its own over a whole corpus.
+
+    Returns:
+        Dict of stage name to {"seconds": best of repeat, "items": count}
+    """
+    documents = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            documents.append(f.read())
+    blocks = [block for doc in documents for block in markdown_to_blocks(doc)]
+    typed_blocks = [(block, block_to_block_type(block)) for block in blocks]
+    texts = [text for pair in typed_blocks for text in inline_texts(*pair)]
+    nodes = [markdown_to_html_node(doc) for doc in documents]
+    pages = [node.to_html() for node in nodes]
+    out_paths = [
+        os.path.join(work_dir, "out", f"page{i}.html") for i in range(len(pages))
+    ]
+    os.makedirs(os.path.join(work_dir, "out"), exist_ok=True)
+
+    def read_sources():
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                f.read()
+
+    def write_outputs():
+        for path, html in zip(out_paths, pages):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(html)
+
+    static_dest = os.path.join(work_dir, "static_out")
+    sync_dest = os.path.join(work_dir, "sync_out")
+    with contextlib.redirect_stdout(io.StringIO()):
+        sync_directory(static_dir, sync_dest)
+    static_files = sum(len(files) for _, _, files in os.walk(static_dir))
+
+    stages = {
+        "markdown_to_blocks": (
+            lambda: [markdown_to_blocks(doc) for doc in documents],
+            len(documents),
+        ),
+        "block_to_block_type": (
+            lambda: [block_to_block_type(block) for block in blocks],
+            len(blocks),
+        ),
+        "text_to_textnodes": (
+            lambda: [text_to_textnodes(text) for text in texts],
+            len(texts),
+        ),
+        "markdown_to_html_node": (
+            lambda: [markdown_to_html_node(doc) for doc in documents],
+            len(documents),
+        ),
+        "to_html": (lambda: [node.to_html() for node in nodes], len(nodes)),
+        "read_sources": (read_sources, len(paths)),
+        "write_outputs": (write_outputs, len(pages)),
+        "static_copy": (
+            lambda: copy_directory_recursive(static_dir, static_dest),
+            static_files,
+        ),
+        "static_sync_noop": (
+            lambda: sync_directory(static_dir, sync_dest),
+            static_files,
+        ),
+    }
+
+    results = {}
+    for name, (function, items) in stages.items():
+        results[name] = {"seconds": best_time(function, repeat), "items": items}
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python3 -m bench", description="Benchmark the site generator."
+    )
+    parser.add_argument(
+        "--shape",
+        choices=SHAPES + ("all",),
+        default="all",
+        help="corpus shape to generate",
+    )
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--blocks", type=int, default=40, help="blocks per page")
+    parser.add_argument("--depth", type=int, default=1, help="directory depth")
+    parser.add_argument("--static-files", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3, help="keep the best of N")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output", "-o", help="write JSON results here instead of stdout"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    shapes = SHAPES if args.shape == "all" else (args.shape,)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+        "shapes": {},
+    }
+    with tempfile.TemporaryDirectory() as work_dir:
+        static_dir = os.path.join(work_dir, "static")
+        generate_static(static_dir, args.static_files, seed=args.seed)
+
+        for shape in shapes:
+            shape_dir = os.path.join(work_dir, shape)
+            paths = generate_corpus(
+                os.path.join(shape_dir, "content"),
+                shape,
+                args.pages,
+                args.blocks,
+                args.depth,
+                args.seed,
+            )
+            source_bytes = sum(os.path.getsize(path) for path in paths)
+            stages = run_stages(paths, static_dir, shape_dir, args.repeat)
+            report["shapes"][shape] = {
+                "pages": len(paths),
+                "source_bytes": source_bytes,
+                "stages": stages,
+            }
+
+            summary = f"{shape} ({len(paths)} pages, {source_bytes} bytes)"
+            print(summary, file=sys.stderr)
+            for name, result in stages.items():
+                milliseconds = result["seconds"] * 1000
+                print(f"  {name:<22} {milliseconds:10.2f} ms", file=sys.stderr)
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
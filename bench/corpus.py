@@ -0,0 +1,134 @@
+import os
+import random
+
+
+SHAPES = ("paragraph", "list", "link", "code", "deep")
+
+WORDS = (
+    "ring shire hobbit wizard elf dwarf river mountain forest road tower king "
+    "sword song lore age star ship gate hall fire shadow light journey council"
+).split()
+
+
+def sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def inline_text(rng, words=12):
+    # Plain words with the occasional bold, italic or code span
+    parts = []
+    for _ in range(words):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < 0.05:
+            word = f"**{word}**"
+        elif roll < 0.1:
+            word = f"_{word}_"
+        elif roll < 0.13:
+            word = f"`{word}`"
+        parts.append(word)
+    return " ".join(parts)
+
+
+def link(rng):
+    word = rng.choice(WORDS)
+    return f"[{word}](/{word}/{rng.randint(1, 9999)})"
+
+
+def paragraph_block(rng):
+    return inline_text(rng, rng.randint(40, 120))
+
+
+def list_block(rng):
+    items = rng.randint(5, 30)
+    if rng.random() < 0.5:
+        return "\n".join(f"- {inline_text(rng, 8)}" for _ in range(items))
+    return "\n".join(f"{i}. {inline_text(rng, 8)}" for i in range(1, items + 1))
+
+
+def link_block(rng):
+    parts = []
+    for _ in range(rng.randint(20, 80)):
+        parts.append(link(rng) if rng.random() < 0.6 else rng.choice(WORDS))
+    return " ".join(parts)
+
+
+def code_block(rng):
+    lines = [f"    {sentence(rng, 6)}();" for _ in range(rng.randint(200, 800))]
+    return "```\n" + "\n".join(lines) + "\n```"
+
+
+BLOCK_MAKERS = {
+    "paragraph": (paragraph_block,),
+    "list": (list_block,),
+    "link": (link_block,),
+    "code": (code_block, paragraph_block),
+    "deep": (paragraph_block, list_block, link_block),
+}
+
+
+def generate_markdown(shape, rng, blocks=40):
+    """
+    Generate one synthetic markdown page.
+
+    Args:
+        shape: One of SHAPES, deciding which kind of block dominates
+        rng: random.Random instance
+        blocks: Number of blocks after the title
+
+    Returns:
+        String containing the markdown page
+    """
+    makers = BLOCK_MAKERS[shape]
+    parts = [f"# {sentence(rng, 4)}"]
+    for i in range(blocks):
+        if i % 10 == 0:
+            parts.append(f"## {sentence(rng, 3)}")
+        if i % 15 == 7:
+            parts.append(f"> {inline_text(rng, 20)}")
+        parts.append(rng.choice(makers)(rng))
+    return "\n\n".join(parts) + "\n"
+
+
+def generate_corpus(root, shape, pages, blocks=40, depth=1, seed=0):
+    """
+    Write a synthetic content tree.
+
+    Args:
+        root: Directory to write the content into
+        shape: One of SHAPES
+        pages: Number of pages
+        blocks: Number of blocks per page
+        depth: Directory nesting depth; "deep" corpora default to 8
+        seed: Seed so the same arguments produce the same corpus
+
+    Returns:
+        List of written markdown paths
+    """
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown corpus shape: {shape}")
+    if shape == "deep" and depth == 1:
+        depth = 8
+
+    rng = random.Random(seed)
+    paths = []
+    for page in range(pages):
+        dirs = [f"d{rng.randint(0, 3)}" for _ in range(rng.randint(0, depth - 1))]
+        page_dir = os.path.join(root, *dirs, f"page{page}")
+        os.makedirs(page_dir, exist_ok=True)
+        path = os.path.join(page_dir, "index.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(generate_markdown(shape, rng, blocks))
+        paths.append(path)
+    return paths
+
+
+def generate_static(root, files=50, size=64 * 1024, seed=0):
+    """Write a static directory of pseudo-random binary assets."""
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(root, "images"), exist_ok=True)
+    for i in range(files):
+        with open(os.path.join(root, "images", f"image{i}.png"), "wb") as f:
+            f.write(rng.randbytes(size))
+    with open(os.path.join(root, "index.css"), "w", encoding="utf-8") as f:
+        f.write("body { margin: 0 auto; max-width: 40em; }\n")
@@ -1,2 +1 @@
-python3 src/main.py
-python3 -m http.server 8888 --directory public
+python3 src/main.py serve --watch --port 8888
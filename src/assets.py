@@ -0,0 +1,168 @@
+import os
+import re
+from urllib.parse import urlsplit
+
+from jsonfile import write_json_atomic
+from manifest import file_stat, hash_bytes, hash_file
+from outputwriter import OutputWriter
+
+
+ASSET_MANIFEST_NAME = "asset-manifest.json"
+# Files referenced from pages that can be cached forever under a new name;
+# anything else, like favicon.ico or robots.txt, keeps its well-known name
+FINGERPRINT_EXTENSIONS = {
+    ".css",
+    ".js",
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".svg",
+    ".webp",
+    ".avif",
+    ".woff",
+    ".woff2",
+}
+FINGERPRINT_LENGTH = 10
+# Stylesheets whose url() references were rewritten are published from here
+STAGING_DIR = os.path.join(".build_cache", "assets")
+CSS_URL_PATTERN = re.compile(r"""url\(\s*(['"]?)([^'"()\s]+)\1\s*\)""")
+
+
+def fingerprint_path(rel_path, digest):
+    """
+    Insert a content hash before a file's extension.
+
+    Args:
+        rel_path: Relative path such as "images/logo.png"
+        digest: Hex digest of the file's content
+
+    Returns:
+        Path such as "images/logo.1a2b3c4d5e.png"
+    """
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{digest[:FINGERPRINT_LENGTH]}{ext}"
+
+
+class AssetFingerprinter:
+    """
+    Names static files after their content and records the new names.
+
+    Its rename method is passed to sync_directory. The recorded assets map
+    root-relative URLs to their fingerprinted URLs, in the form UrlRewriter
+    takes, e.g. {"/index.css": "/index.1a2b3c4d5e.css"}.
+
+    The url() references in stylesheets are rewritten to the fingerprinted
+    names too, and a stylesheet is named after its rewritten content, so it
+    changes name whenever an asset it references does. File hashes are
+    reused while a file's size and mtime match the last build.
+
+    Args:
+        static_dir: Path to the static directory
+        known_hashes: Dict of relative path to {"hash", "size", "mtime"}
+            from the last build, as recorded in hashes
+        staging_dir: Directory to write rewritten stylesheets to
+    """
+
+    def __init__(self, static_dir, known_hashes=None, staging_dir=STAGING_DIR):
+        self.static_dir = static_dir
+        self.known_hashes = known_hashes or {}
+        self.staging_dir = staging_dir
+        self.hashes = {}
+        self.assets = {}
+        self.published = {}
+        self.resolving = set()
+
+    def rename(self, rel_path, src_path):
+        return self.fingerprint(os.path.normpath(rel_path))
+
+    def fingerprint(self, rel_path):
+        """
+        Find the name a static file is published under.
+
+        Returns:
+            Tuple of (relative path to publish to, path of the file to publish)
+        """
+        if rel_path in self.published:
+            return self.published[rel_path]
+        src_path = os.path.join(self.static_dir, rel_path)
+        ext = os.path.splitext(rel_path)[1].lower()
+        if ext not in FINGERPRINT_EXTENSIONS:
+            return rel_path, src_path
+
+        if ext == ".css":
+            result = self.fingerprint_stylesheet(rel_path, src_path)
+        else:
+            result = fingerprint_path(rel_path, self.content_hash(rel_path, src_path))
+            result = (result, src_path)
+        url = "/" + rel_path.replace(os.sep, "/")
+        self.assets[url] = "/" + result[0].replace(os.sep, "/")
+        self.published[rel_path] = result
+        return result
+
+    def content_hash(self, rel_path, src_path):
+        size, mtime = file_stat(src_path)
+        known = self.known_hashes.get(rel_path)
+        if known is not None and (known["size"], known["mtime"]) == (size, mtime):
+            file_hash = known["hash"]
+        else:
+            file_hash = hash_file(src_path)
+        self.hashes[rel_path] = {"hash": file_hash, "size": size, "mtime": mtime}
+        return file_hash
+
+    def fingerprint_stylesheet(self, rel_path, src_path):
+        with open(src_path, "r", encoding="utf-8", newline="") as f:
+            css = f.read()
+        # A stylesheet that imports itself, directly or not, keeps that URL
+        self.resolving.add(rel_path)
+        try:
+            rewritten = CSS_URL_PATTERN.sub(
+                lambda match: self.rewrite_css_url(match, rel_path), css
+            )
+        finally:
+            self.resolving.discard(rel_path)
+
+        fingerprinted = fingerprint_path(rel_path, hash_bytes(rewritten.encode()))
+        if rewritten == css:
+            return fingerprinted, src_path
+        staged_path = os.path.join(self.staging_dir, rel_path)
+        os.makedirs(os.path.dirname(staged_path), exist_ok=True)
+        # Left untouched if identical, so the synced copy stays current
+        writer = OutputWriter(staged_path)
+        writer.write(rewritten)
+        writer.close()
+        return fingerprinted, staged_path
+
+    def rewrite_css_url(self, match, css_path):
+        quote, url = match.groups()
+        parts = urlsplit(url)
+        if parts.scheme or parts.netloc or not parts.path:
+            return match.group(0)
+        css_dir = os.path.dirname(css_path)
+        if parts.path.startswith("/"):
+            target = os.path.normpath(parts.path[1:])
+        else:
+            target = os.path.normpath(os.path.join(css_dir, parts.path))
+        if (
+            target.startswith(os.pardir)
+            or target in self.resolving
+            or not os.path.isfile(os.path.join(self.static_dir, target))
+        ):
+            return match.group(0)
+
+        published = self.fingerprint(target)[0]
+        if parts.path.startswith("/"):
+            path = "/" + published
+        else:
+            path = os.path.relpath(published, css_dir or os.curdir)
+        path = path.replace(os.sep, "/")
+        return f"url({quote}{path}{url[len(parts.path) :]}{quote})"
+
+    def save(self, path):
+        """
+        Write the asset manifest for servers and deploy tooling.
+
+        Args:
+            path: Path of the JSON file to write
+        """
+        write_json_atomic(path, self.assets, indent=1, sort_keys=True)
@@ -0,0 +1,47 @@
+from collections import OrderedDict
+
+
+class BlockCache:
+    """
+    Bounded LRU cache of rendered blocks, keyed by block type, text and basepath.
+
+    Cached nodes are shared between pages, so they must not be modified
+    after they are rendered.
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        node = self.entries.get(key)
+        if node is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return node
+
+    def put(self, key, node):
+        self.entries[key] = node
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self.entries),
+        }
+
+    def merge_stats(self, stats):
+        # Counters from a cache living in a worker process
+        self.hits += stats["hits"]
+        self.misses += stats["misses"]
+        self.evictions += stats["evictions"]
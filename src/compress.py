@@ -0,0 +1,202 @@
+from concurrent.futures import ProcessPoolExecutor
+import gzip
+import hashlib
+import os
+
+try:
+    import brotli
+except ImportError:
+    # Brotli is optional; without it only .gz files are written
+    brotli = None
+
+from jsonfile import load_json, write_json_atomic
+
+
+PRECOMPRESS_MANIFEST_PATH = os.path.join(".build_cache", "precompress.json")
+COMPRESSIBLE_EXTENSIONS = {
+    ".html",
+    ".css",
+    ".js",
+    ".mjs",
+    ".json",
+    ".svg",
+    ".txt",
+    ".xml",
+    ".map",
+}
+ALL_FORMATS = ("gz", "br")
+CHUNK_SIZE = 1 << 20
+
+
+def available_formats():
+    return list(ALL_FORMATS) if brotli is not None else ["gz"]
+
+
+def is_compressible(path):
+    return os.path.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+
+def read_chunks(path):
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            yield chunk
+
+
+def precompress_file(path, known_hash, formats):
+    """
+    Write compressed siblings of a file unless they are already current.
+
+    Args:
+        path: Path of the file to compress
+        known_hash: Content hash recorded when its siblings were last written
+        formats: List of formats to write, "gz" and/or "br"
+
+    Returns:
+        Tuple of (content hash, whether the siblings were written)
+    """
+    digest = hashlib.sha256()
+    for chunk in read_chunks(path):
+        digest.update(chunk)
+    content_hash = digest.hexdigest()
+    if content_hash == known_hash and all(
+        os.path.exists(f"{path}.{fmt}") for fmt in formats
+    ):
+        return content_hash, False
+
+    for fmt in formats:
+        tmp_path = f"{path}.{fmt}.tmp"
+        with open(tmp_path, "wb") as f:
+            if fmt == "gz":
+                # No name and a fixed mtime keep the output reproducible
+                with gzip.GzipFile("", "wb", 9, f, mtime=0) as gz:
+                    for chunk in read_chunks(path):
+                        gz.write(chunk)
+            else:
+                compressor = brotli.Compressor(quality=11)
+                for chunk in read_chunks(path):
+                    f.write(compressor.process(chunk))
+                f.write(compressor.finish())
+        os.replace(tmp_path, f"{path}.{fmt}")
+    return content_hash, True
+
+
+def precompress_directory(
+    output_dir, manifest_path=PRECOMPRESS_MANIFEST_PATH, jobs=1, formats=None
+):
+    """
+    Write .gz (and .br, if brotli is installed) siblings for compressible
+    files, skipping files that did not change since the last run.
+
+    A file whose size and mtime match the last run is skipped with a stat
+    call; only the others are read and hashed, so rewriting a file with the
+    same content does not recompress it either.
+
+    Compressed files left behind by outputs that no longer exist are removed.
+
+    Args:
+        output_dir: Path to the generated site
+        manifest_path: Path of the JSON file recording the compressed files
+        jobs: Number of worker processes, 0 for one per CPU
+        formats: Formats to write, defaults to every available one
+
+    Returns:
+        Tuple of (compressed file count, skipped file count, removed count)
+    """
+    if formats is None:
+        formats = available_formats()
+    previous = load_precompress_manifest(manifest_path)
+    previous_files = previous.get("files", {})
+    # Siblings written for another set of formats do not count as current
+    if previous.get("formats") == formats:
+        known_files = previous_files
+    else:
+        known_files = {}
+
+    paths = []
+    for root, dirs, files in os.walk(output_dir):
+        dirs.sort()
+        for file in sorted(files):
+            if is_compressible(file):
+                paths.append(os.path.join(root, file))
+
+    files = {}
+    stale = []
+    for path in paths:
+        rel_path = os.path.relpath(path, output_dir)
+        stat = os.stat(path)
+        known = known_files.get(rel_path)
+        if not isinstance(known, dict):
+            # Not compressed before, or recorded by an older version
+            known = {}
+        if (
+            known.get("size") == stat.st_size
+            and known.get("mtime") == stat.st_mtime_ns
+            and all(os.path.exists(f"{path}.{fmt}") for fmt in formats)
+        ):
+            files[rel_path] = known
+            continue
+        stale.append((path, rel_path, stat, known.get("hash")))
+
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    arguments = [(path, known_hash, formats) for path, _, _, known_hash in stale]
+    if jobs == 1 or len(stale) <= 1:
+        results = [precompress_file(*args) for args in arguments]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(precompress_file, *args) for args in arguments]
+            results = [future.result() for future in futures]
+
+    compressed = 0
+    for (_, rel_path, stat, _), (content_hash, written) in zip(stale, results):
+        files[rel_path] = {
+            "hash": content_hash,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+        }
+        if written:
+            compressed += 1
+
+    # Drop the siblings of files that are gone, or of formats no longer used
+    removed = 0
+    for rel_path in previous_files:
+        for fmt in ALL_FORMATS:
+            if rel_path not in files or fmt not in formats:
+                removed += remove_file(os.path.join(output_dir, f"{rel_path}.{fmt}"))
+
+    save_precompress_manifest(manifest_path, {"files": files, "formats": formats})
+    return compressed, len(paths) - compressed, removed
+
+
+def remove_precompressed(output_dir, manifest_path=PRECOMPRESS_MANIFEST_PATH):
+    """
+    Remove every compressed sibling written by precompress_directory, so
+    a build without precompression does not leave stale ones behind.
+
+    Returns:
+        Number of removed files
+    """
+    previous = load_precompress_manifest(manifest_path)
+    removed = 0
+    for rel_path in previous.get("files", {}):
+        for fmt in ALL_FORMATS:
+            removed += remove_file(os.path.join(output_dir, f"{rel_path}.{fmt}"))
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    return removed
+
+
+def remove_file(path):
+    if os.path.isfile(path):
+        os.remove(path)
+        return 1
+    return 0
+
+
+def load_precompress_manifest(manifest_path):
+    # Missing or corrupt just means everything is compressed again
+    return load_json(manifest_path, {})
+
+
+def save_precompress_manifest(manifest_path, data):
+    write_json_atomic(manifest_path, data, indent=1, sort_keys=True)
@@ -0,0 +1,28 @@
+class Document:
+    """
+    A parsed markdown page: the rendered node tree plus the metadata
+    collected while its blocks were walked.
+
+    Args:
+        node: ParentNode with tag='div' containing a child node per block,
+            or its rendered HTML for a page taken from the page cache
+        title: Text of the first h1 header, or None if there is none
+        headings: List of (level, text) tuples for every heading, in order
+        block_count: Number of blocks in the document
+        terms: Optional dict of search term to count, filled while parsing
+    """
+
+    __slots__ = ("node", "title", "headings", "block_count", "terms")
+
+    def __init__(self, node, title=None, headings=None, block_count=0, terms=None):
+        self.node = node
+        self.title = title
+        self.headings = [] if headings is None else headings
+        self.block_count = block_count
+        self.terms = terms
+
+    def __repr__(self):
+        return (
+            f'Document("{self.title}", {len(self.headings)} headings, '
+            f"{self.block_count} blocks)"
+        )
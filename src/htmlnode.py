@@ -1,4 +1,7 @@
 class HTMLNode:
+    # No per-instance __dict__: pages allocate one node per inline span
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -6,15 +9,23 @@ class HTMLNode:
         self.props = props
 
     def to_html(self):
+        chunks = []
+        self.render_into(chunks.append)
+        return "".join(chunks)
+
+    def render_into(self, write):
+        """
+        Stream the HTML for this node as a sequence of string chunks.
+
+        Args:
+            write: Callable receiving each chunk, e.g. list.append or file.write
+        """
         raise NotImplementedError
 
     def props_to_html(self):
         if self.props is None or self.props == {}:
             return ""
-        result = ""
-        for prop in self.props.keys():
-            result += f' {prop}="{self.props[prop]}"'
-        return result
+        return "".join(f' {prop}="{value}"' for prop, value in self.props.items())
 
     def __repr__(self):
         result = ""
@@ -34,20 +45,18 @@ class HTMLNode:
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
-    def to_html(self):
+    def render_into(self, write):
         if self.value is None:
             raise ValueError
         if self.tag is None:
-            return self.value
-        result = f"<{self.tag}"
-        if self.props is not None:
-            for prop in self.props.keys():
-                result += f' {prop}="{self.props[prop]}"'
-        result += f">{self.value}</{self.tag}>"
-        return result
+            write(self.value)
+            return
+        write(f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>")
 
     def __repr__(self):
         result = ""
@@ -59,21 +68,17 @@ class LeafNode(HTMLNode):
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
+    def render_into(self, write):
         if self.tag is None:
             raise ValueError("Tag is required")
         if self.children is None:
             raise ValueError("Parent must have children")
-        result = ""
-        result += f"<{self.tag}"
-        if self.props is not None:
-            for prop in self.props.keys():
-                result += f' {prop}="{self.props[prop]}"'
-        result += ">"
+        write(f"<{self.tag}{self.props_to_html()}>")
         for child in self.children:
-            result += child.to_html()
-        result += f"</{self.tag}>"
-        return result
+            child.render_into(write)
+        write(f"</{self.tag}>")
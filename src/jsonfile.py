@@ -0,0 +1,40 @@
+import json
+import os
+
+
+def load_json(path, default=None):
+    """
+    Read a JSON state file written by write_json_atomic.
+
+    Args:
+        path: Path of the file
+        default: Value returned if the file is missing or corrupt
+
+    Returns:
+        The decoded data, or default
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # Missing or corrupt state is rebuilt by the caller
+        return default
+
+
+def write_json_atomic(path, data, **options):
+    """
+    Write a JSON file through a temporary file and os.replace, so that an
+    interrupted build never leaves half a file behind.
+
+    Args:
+        path: Path of the file, its directory is created if needed
+        data: JSON-serializable data
+        **options: Passed to json.dump, e.g. indent or sort_keys
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, **options)
+    os.replace(tmp_path, path)
@@ -1,11 +1,357 @@
+import argparse
+import json
+import os
+import shutil
 import sys
-from utils import copy_directory_recursive, generate_pages_recursive
+
+# Only what the no-op check needs is imported up front; the parser and
+# renderer are imported by build()
+from snapshot import (
+    digest_stats,
+    load_snapshot,
+    save_snapshot,
+    snapshot_tree,
+    stat_paths,
+)
+
+
+CONTENT_DIR = "content"
+STATIC_DIR = "static"
+TEMPLATE_PATH = "template.html"
+OUTPUT_DIR = "docs"
+PROFILE_JSON_PATH = os.path.join(".build_cache", "profile.json")
+PROFILE_TEXT_PATH = os.path.join(".build_cache", "profile.txt")
+SNAPSHOT_PATH = os.path.join(".build_cache", "snapshot.json")
+# The generator's own sources, so a changed generator is not a no-op
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Options that do not change the output
+RUN_OPTIONS = ("jobs", "clean", "profile", "profile_top")
+
+
+def parse_shard(value):
+    """
+    Parse a --shard value.
+
+    Args:
+        value: String of the form "i/N", e.g. "2/4"
+
+    Returns:
+        Tuple of (shard number, shard count)
+    """
+    try:
+        number, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N, got {value!r}")
+    if not 1 <= number <= count:
+        raise argparse.ArgumentTypeError(f"shard {number} is not in 1..{count}")
+    return number, count
+
+
+def parse_jobs(value):
+    """
+    Parse a --jobs value.
+
+    Args:
+        value: String holding the worker count, 0 for one per CPU
+
+    Returns:
+        The worker count
+    """
+    try:
+        jobs = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number, got {value!r}")
+    if jobs < 0:
+        raise argparse.ArgumentTypeError(f"job count {jobs} is below 0")
+    return jobs
+
+
+def add_build_arguments(parser):
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=parse_jobs,
+        default=1,
+        metavar="N",
+        help="render pages on N worker processes (0 for one per CPU)",
+    )
+    parser.add_argument(
+        "--clean",
+        action="store_true",
+        help="empty the output directory and rebuild everything",
+    )
+    parser.add_argument(
+        "--hash-static",
+        action="store_true",
+        help="compare static file contents, not just size and mtime",
+    )
+    parser.add_argument(
+        "--link-static",
+        action="store_true",
+        help="hardlink static files into the output instead of copying",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="i/N",
+        help="render only the i-th of N shards of the pages, see 'merge'",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="publish static assets under content-hashed names and link to those",
+    )
+    parser.add_argument(
+        "--precompress",
+        action="store_true",
+        help="write .gz (and .br with brotli installed) copies of text outputs",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="strip template comments and collapse whitespace in the pages",
+    )
+    parser.add_argument(
+        "--search-index",
+        action="store_true",
+        help="write a sharded full-text search index of the pages",
+    )
+    parser.add_argument(
+        "--block-cache",
+        type=int,
+        default=0,
+        metavar="N",
+        help="reuse up to N rendered blocks repeated across pages (0 to disable)",
+    )
+    parser.add_argument(
+        "--page-cache",
+        type=int,
+        default=0,
+        metavar="MB",
+        help="keep up to MB megabytes of rendered pages between builds (0: off)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=f"write a timing report to {PROFILE_JSON_PATH} and {PROFILE_TEXT_PATH}",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        metavar="N",
+        help="number of slowest pages listed in the profile report",
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static site.")
+    parser.add_argument(
+        "basepath", nargs="?", default="/", help="root path the site is served from"
+    )
+    add_build_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def build_settings(args):
+    # The options of a build that change its output, as stored in JSON
+    settings = {
+        name: value for name, value in vars(args).items() if name not in RUN_OPTIONS
+    }
+    return json.loads(json.dumps(settings))
+
+
+def snapshot_inputs():
+    # Directories are recorded too, so an added or removed file shows in
+    # its directory's mtime without listing it again. The templates outside
+    # the content directory are added from the build's own reads.
+    snapshot = {}
+    for path in (CONTENT_DIR, STATIC_DIR):
+        snapshot_tree(path, snapshot, directories=True)
+    snapshot_tree(SOURCE_DIR, snapshot, suffix=".py")
+    return snapshot
+
+
+def snapshot_outputs(snapshot):
+    # Directories only: writing, replacing or deleting an output through a
+    # new file, as builds and git checkouts do, changes its directory's
+    # mtime. An edit in place goes unnoticed, which halves the paths to
+    # check; a build with --clean rewrites everything.
+    return snapshot_tree(OUTPUT_DIR, snapshot, directories=True, files=False)
+
+
+def is_up_to_date(args):
+    """
+    Check with stat calls alone whether the last build is still current.
+
+    The last build recorded the sizes and mtimes of its inputs and their
+    directories, the templates it read, the generator and the output
+    directories. Each recorded path is stat'ed again, without listing any
+    directory, and the results are compared with the saved digest.
+
+    Returns:
+        True if nothing changed since the last successful build with the
+        same settings
+    """
+    settings, digest, paths = load_snapshot(SNAPSHOT_PATH)
+    if settings is None or settings != build_settings(args):
+        return False
+    stats = stat_paths(paths)
+    return stats is not None and digest_stats(stats) == digest
+
+
+def build(args):
+    from assets import ASSET_MANIFEST_NAME, AssetFingerprinter
+    from blockcache import BlockCache
+    from compress import precompress_directory, remove_precompressed
+    from manifest import BuildManifest
+    from pagecache import PageCache
+    from profiler import BuildProfile, null_stage, write_report
+    from search import SearchIndex, remove_search_index
+    from utils import discover_pages, generate_pages, select_shard, sync_directory
+
+    # Taken before anything is read, so edits made during the build are
+    # picked up by the next one
+    inputs = snapshot_inputs()
+    if os.path.exists(SNAPSHOT_PATH):
+        os.remove(SNAPSHOT_PATH)
+
+    profile = BuildProfile() if args.profile else None
+    cache = BlockCache(args.block_cache) if args.block_cache > 0 else None
+    page_cache = None
+    if args.page_cache > 0:
+        page_cache = PageCache(max_bytes=args.page_cache * 1024 * 1024)
+    stage = null_stage if profile is None else profile.stage
+
+    with stage("load_manifest"):
+        manifest = BuildManifest()
+    if args.clean and os.path.exists(OUTPUT_DIR):
+        shutil.rmtree(OUTPUT_DIR)
+
+    fingerprinter = None
+    if args.fingerprint:
+        fingerprinter = AssetFingerprinter(STATIC_DIR, manifest.asset_hashes)
+    with stage("copy_static"):
+        static_files, copied, deleted, copied_bytes = sync_directory(
+            STATIC_DIR,
+            OUTPUT_DIR,
+            manifest.static_files,
+            args.hash_static,
+            args.link_static,
+            None if fingerprinter is None else fingerprinter.rename,
+        )
+    manifest.static_files = static_files
+    if profile is not None:
+        # A copy reads and writes every byte
+        profile.bytes_read += copied_bytes
+        profile.bytes_written += copied_bytes
+    print(f"Static files: {copied} copied, {deleted} deleted")
+
+    asset_manifest_path = os.path.join(OUTPUT_DIR, ASSET_MANIFEST_NAME)
+    if fingerprinter is not None:
+        manifest.asset_hashes = fingerprinter.hashes
+        fingerprinter.save(asset_manifest_path)
+        assets = fingerprinter.assets
+    else:
+        assets = None
+        if os.path.exists(asset_manifest_path):
+            os.remove(asset_manifest_path)
+
+    pages = discover_pages(CONTENT_DIR, OUTPUT_DIR)
+    if args.shard is not None:
+        total = len(pages)
+        pages = select_shard(pages, CONTENT_DIR, args.shard)
+        print(f"Shard {args.shard[0]}/{args.shard[1]}: {len(pages)} of {total} pages")
+
+    index = SearchIndex() if args.search_index else None
+    try:
+        page_stats = generate_pages(
+            pages,
+            TEMPLATE_PATH,
+            args.basepath,
+            manifest=manifest,
+            jobs=args.jobs,
+            profile=profile,
+            cache=cache,
+            assets=assets,
+            index=index,
+            page_cache=page_cache,
+            content_dir=CONTENT_DIR,
+            minify=args.minify,
+        )
+        for dest_path in manifest.remove_stale_outputs(OUTPUT_DIR):
+            print(f"Deleted: {dest_path}")
+        print(
+            f"Pages: {page_stats['pages']} total, {page_stats['rendered']} rendered,"
+            f" {page_stats['written']} written"
+        )
+    finally:
+        # Keep the pages that did build, even if others failed
+        with stage("save_manifest"):
+            manifest.save()
+        if index is not None:
+            index.save()
+
+    if index is not None:
+        with stage("search_index"):
+            shards = index.write(OUTPUT_DIR)
+        print(f"Search index: {len(index.pages)} pages, {shards} shards")
+    else:
+        remove_search_index(OUTPUT_DIR)
+
+    if args.precompress:
+        with stage("precompress"):
+            compressed, skipped, removed = precompress_directory(
+                OUTPUT_DIR, jobs=args.jobs
+            )
+        print(
+            f"Precompressed: {compressed} compressed, {skipped} unchanged,"
+            f" {removed} removed"
+        )
+    else:
+        # Stale compressed copies would be served instead of the new outputs
+        remove_precompressed(OUTPUT_DIR)
+
+    if page_cache is not None:
+        with stage("prune_page_cache"):
+            entries, evicted = page_cache.prune()
+        print(f"Page cache: {entries} entries, {evicted} evicted")
+    if cache is not None:
+        stats = cache.stats()
+        print(
+            f"Block cache: {stats['hits']} hits, {stats['misses']} misses,"
+            f" {stats['evictions']} evictions"
+        )
+    if profile is not None:
+        report = profile.report(args.profile_top)
+        if cache is not None:
+            report["block_cache"] = cache.stats()
+        print(write_report(report, PROFILE_JSON_PATH, PROFILE_TEXT_PATH), end="")
+
+    # The templates are recorded as they were when the build read them
+    templates = page_stats["templates"]
+    inputs.update(templates)
+    save_snapshot(SNAPSHOT_PATH, build_settings(args), snapshot_outputs(inputs))
+    return manifest, templates
 
 
 def main():
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
-    copy_directory_recursive("static", "docs")
-    generate_pages_recursive("content", "template.html", "docs", basepath)
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        from serve import serve
+
+        serve(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "merge":
+        from merge import merge
+
+        merge(sys.argv[2:])
+        return
+    args = parse_args()
+    if not args.clean and not args.profile and is_up_to_date(args):
+        print("Nothing changed")
+        return
+    build(args)
 
 
-main()
+if __name__ == "__main__":
+    main()
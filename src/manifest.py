@@ -0,0 +1,188 @@
+import functools
+import hashlib
+import os
+
+from jsonfile import load_json, write_json_atomic
+
+
+MANIFEST_PATH = os.path.join(".build_cache", "manifest.json")
+GENERATOR_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path):
+    # Hash in chunks so very large sources are never read whole
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def generator_digest(source_dir=GENERATOR_DIR):
+    """
+    Digest of the generator's own modules, tests excluded.
+
+    Any change to the parser or renderer changes it, so outputs and cached
+    pages produced by an older generator are not reused.
+
+    Args:
+        source_dir: Directory holding the generator's modules
+
+    Returns:
+        Hex digest of the module names and contents
+    """
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(source_dir)):
+        if name.endswith(".py") and not name.startswith("test_"):
+            file_hash = hash_file(os.path.join(source_dir, name))
+            digest.update(f"{name}\0{file_hash}\n".encode())
+    return digest.hexdigest()
+
+
+def file_stat(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def remove_empty_parents(path, root_dir):
+    # Walk up from the removed file, stopping at root_dir or a non-empty one
+    root_dir = os.path.normpath(root_dir)
+    parent = os.path.dirname(os.path.normpath(path))
+    while parent != root_dir and parent.startswith(root_dir + os.sep):
+        try:
+            os.rmdir(parent)
+        except OSError:
+            return
+        parent = os.path.dirname(parent)
+
+
+class BuildManifest:
+    """
+    Persisted record of the inputs and output of every generated page.
+
+    Entries are keyed by source path and hold the source hash, layout hash,
+    URL key (basepath and asset names), generator digest, destination path
+    and output hash from the build that produced the page. A page is fresh
+    when all of them still match. The size and mtime of the source and the
+    output are recorded too: while they match, the files are not read again.
+    The manifest also remembers which static files were synced, so orphans
+    can be removed, and the hashes of fingerprinted assets with their sizes
+    and mtimes.
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        self.entries = {}
+        self.static_files = []
+        self.asset_hashes = {}
+        self.seen = set()
+        self.source_stats = {}
+        self.generator = generator_digest()
+        self.load()
+
+    def load(self):
+        # A missing or corrupt manifest just means a full rebuild
+        data = load_json(self.path, {})
+        self.entries = data.get("pages", {})
+        self.static_files = data.get("static", [])
+        self.asset_hashes = data.get("assets", {})
+
+    def save(self):
+        # Drop entries for pages that were not part of this build
+        pages = {}
+        for source_path in sorted(self.seen):
+            if source_path in self.entries:
+                pages[source_path] = self.entries[source_path]
+        self.entries = pages
+        write_json_atomic(
+            self.path,
+            {
+                "pages": self.entries,
+                "static": sorted(self.static_files),
+                "assets": self.asset_hashes,
+            },
+            indent=1,
+            sort_keys=True,
+        )
+
+    def remove_stale_outputs(self, output_dir=None):
+        """
+        Delete the outputs of pages that were not part of this build.
+
+        Args:
+            output_dir: Output directory; directories under it left empty
+                by the removals are removed too
+
+        Returns:
+            List of removed output paths
+        """
+        removed = []
+        for source_path, entry in self.entries.items():
+            if source_path in self.seen:
+                continue
+            if os.path.isfile(entry["dest"]):
+                os.remove(entry["dest"])
+                removed.append(entry["dest"])
+                if output_dir is not None:
+                    remove_empty_parents(entry["dest"], output_dir)
+        return removed
+
+    def hash_source(self, source_path):
+        """
+        Hash a page source, reusing the recorded hash while its stat matches.
+
+        Returns:
+            SHA-256 hex digest of the source
+        """
+        stat = file_stat(source_path)
+        self.source_stats[source_path] = stat
+        entry = self.entries.get(source_path)
+        if entry is not None and entry.get("source_stat") == stat:
+            return entry["source"]
+        return hash_file(source_path)
+
+    def is_fresh(self, source_path, dest_path, source_hash, template_hash, url_key):
+        self.seen.add(source_path)
+
+        entry = self.entries.get(source_path)
+        if entry is None:
+            return False
+        if (
+            entry["source"] != source_hash
+            or entry["template"] != template_hash
+            or entry.get("urls") != url_key
+            or entry.get("generator") != self.generator
+            or entry["dest"] != dest_path
+        ):
+            return False
+
+        # The output must still be the one we wrote last time
+        if not os.path.isfile(dest_path):
+            return False
+        output_stat = file_stat(dest_path)
+        if entry.get("output_stat") != output_stat:
+            if hash_file(dest_path) != entry["output"]:
+                return False
+            entry["output_stat"] = output_stat
+        entry["source_stat"] = self.source_stats.get(source_path)
+        return True
+
+    def record(
+        self, source_path, dest_path, source_hash, template_hash, url_key, output_hash
+    ):
+        self.seen.add(source_path)
+        self.entries[source_path] = {
+            "source": source_hash,
+            "template": template_hash,
+            "urls": url_key,
+            "generator": self.generator,
+            "dest": dest_path,
+            "output": output_hash,
+            "source_stat": self.source_stats.get(source_path),
+            "output_stat": file_stat(dest_path),
+        }
@@ -0,0 +1,228 @@
+import argparse
+import os
+
+from compress import (
+    PRECOMPRESS_MANIFEST_PATH,
+    load_precompress_manifest,
+    save_precompress_manifest,
+)
+from main import OUTPUT_DIR
+from manifest import MANIFEST_PATH, BuildManifest, hash_file
+from search import SEARCH_CACHE_PATH, SEARCH_DIR_NAME, SearchIndex, remove_search_index
+from utils import sync_file
+
+
+def collect_outputs(shard_dirs, output_dir):
+    """
+    Find the output files of every shard and check that they agree.
+
+    Files every shard writes, like the static files, must be identical.
+    The search index is left out, as it only covers one shard's pages.
+
+    Args:
+        shard_dirs: Directories the shard builds ran in
+        output_dir: Output directory, relative to each shard directory
+
+    Returns:
+        Dict of path relative to the output directory to a (path, hash) tuple
+        of the file to publish there
+
+    Raises:
+        ValueError: If two shards wrote different files to the same path
+    """
+    outputs = {}
+    for shard_dir in shard_dirs:
+        shard_output = os.path.join(shard_dir, output_dir)
+        if not os.path.isdir(shard_output):
+            raise FileNotFoundError(f"Shard output does not exist: {shard_output}")
+
+        for root, dirs, files in os.walk(shard_output):
+            rel_root = os.path.relpath(root, shard_output)
+            if rel_root == "." and SEARCH_DIR_NAME in dirs:
+                dirs.remove(SEARCH_DIR_NAME)
+            for file in files:
+                src_file = os.path.join(root, file)
+                rel_file = os.path.normpath(os.path.join(rel_root, file))
+                file_hash = hash_file(src_file)
+                if rel_file not in outputs:
+                    outputs[rel_file] = (src_file, file_hash)
+                elif outputs[rel_file][1] != file_hash:
+                    raise ValueError(
+                        f"Shards disagree on {rel_file}: "
+                        f"{outputs[rel_file][0]} and {src_file} differ"
+                    )
+    return outputs
+
+
+def merge_manifests(shard_dirs, manifest_path=MANIFEST_PATH):
+    """
+    Combine the build manifests of the shards.
+
+    Args:
+        shard_dirs: Directories the shard builds ran in
+        manifest_path: Path to write the merged manifest to
+
+    Returns:
+        BuildManifest holding every shard's pages and static files
+
+    Raises:
+        ValueError: If two shards built the same page
+    """
+    manifest = BuildManifest(manifest_path)
+    manifest.entries = {}
+    manifest.asset_hashes = {}
+    static_files = set()
+    owners = {}
+    for shard_dir in shard_dirs:
+        shard_manifest_path = os.path.join(shard_dir, MANIFEST_PATH)
+        if not os.path.isfile(shard_manifest_path):
+            raise FileNotFoundError(
+                f"Shard manifest does not exist: {shard_manifest_path}"
+            )
+        shard_manifest = BuildManifest(shard_manifest_path)
+        for source_path, entry in shard_manifest.entries.items():
+            if source_path in owners:
+                raise ValueError(
+                    f"{source_path} was built by both {owners[source_path]}"
+                    f" and {shard_dir}"
+                )
+            owners[source_path] = shard_dir
+            manifest.entries[source_path] = entry
+            manifest.seen.add(source_path)
+        static_files.update(shard_manifest.static_files)
+        manifest.asset_hashes.update(shard_manifest.asset_hashes)
+    manifest.static_files = sorted(static_files)
+    return manifest
+
+
+def merge_precompress_manifests(shard_dirs):
+    """
+    Combine the records of the compressed copies the shards wrote.
+
+    The copies are merged with the other outputs; a later build needs their
+    records to keep them current, or to remove them without --precompress.
+
+    Args:
+        shard_dirs: Directories the shard builds ran in
+
+    Returns:
+        Precompress manifest data covering every shard, or None if no shard
+        precompressed its outputs
+
+    Raises:
+        ValueError: If the shards wrote different compression formats
+    """
+    merged = None
+    for shard_dir in shard_dirs:
+        shard_manifest_path = os.path.join(shard_dir, PRECOMPRESS_MANIFEST_PATH)
+        if not os.path.isfile(shard_manifest_path):
+            continue
+        data = load_precompress_manifest(shard_manifest_path)
+        if merged is None:
+            merged = {"files": {}, "formats": data.get("formats")}
+        elif data.get("formats") != merged["formats"]:
+            raise ValueError(f"Shards disagree on precompress formats: {shard_dir}")
+        for rel_path, entry in data.get("files", {}).items():
+            merged["files"].setdefault(rel_path, entry)
+    return merged
+
+
+def merge_shards(
+    shard_dirs,
+    output_dir=OUTPUT_DIR,
+    manifest_path=MANIFEST_PATH,
+    search_path=SEARCH_CACHE_PATH,
+    precompress_path=PRECOMPRESS_MANIFEST_PATH,
+):
+    """
+    Combine the outputs of sharded builds into one site.
+
+    Every shard directory is where a build with --shard ran, holding its
+    output directory and build cache. The output directory ends up with
+    exactly the files of the shards, and the merged manifest lets a later
+    unsharded build skip the pages. Nothing is written if the shards
+    collide.
+
+    Args:
+        shard_dirs: Directories the shard builds ran in
+        output_dir: Path to the merged site, and the output directory
+            relative to each shard directory
+        manifest_path: Path to write the merged manifest to
+        search_path: Path to write the merged search index cache to
+        precompress_path: Path to write the merged precompress manifest to
+
+    Returns:
+        Dict with the number of shards, pages and files, and the copied and
+        deleted file counts
+    """
+    outputs = collect_outputs(shard_dirs, output_dir)
+    manifest = merge_manifests(shard_dirs, manifest_path)
+    precompressed = merge_precompress_manifests(shard_dirs)
+
+    copied = 0
+    for rel_file, (src_file, file_hash) in sorted(outputs.items()):
+        dest_file = os.path.join(output_dir, rel_file)
+        if os.path.isfile(dest_file) and hash_file(dest_file) == file_hash:
+            continue
+        os.makedirs(os.path.dirname(dest_file), exist_ok=True)
+        sync_file(src_file, dest_file)
+        copied += 1
+
+    deleted = 0
+    for root, dirs, files in os.walk(output_dir):
+        rel_root = os.path.relpath(root, output_dir)
+        if rel_root == "." and SEARCH_DIR_NAME in dirs:
+            dirs.remove(SEARCH_DIR_NAME)
+        for file in files:
+            if os.path.normpath(os.path.join(rel_root, file)) not in outputs:
+                os.remove(os.path.join(root, file))
+                deleted += 1
+    manifest.save()
+    if precompressed is not None:
+        save_precompress_manifest(precompress_path, precompressed)
+    elif os.path.exists(precompress_path):
+        os.remove(precompress_path)
+
+    # Rebuild the search index from the page terms of every shard
+    shard_search_paths = [
+        os.path.join(shard_dir, SEARCH_CACHE_PATH)
+        for shard_dir in shard_dirs
+        if os.path.isfile(os.path.join(shard_dir, SEARCH_CACHE_PATH))
+    ]
+    if shard_search_paths:
+        index = SearchIndex(None)
+        index.path = search_path
+        for shard_search_path in shard_search_paths:
+            index.merge(SearchIndex(shard_search_path).pages)
+        index.write(output_dir)
+        index.save()
+    else:
+        remove_search_index(output_dir, search_path)
+
+    return {
+        "shards": len(shard_dirs),
+        "pages": len(manifest.entries),
+        "files": len(outputs),
+        "copied": copied,
+        "deleted": deleted,
+    }
+
+
+def merge(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Merge the outputs of sharded builds into one site."
+    )
+    parser.add_argument(
+        "shard_dirs",
+        nargs="+",
+        metavar="SHARD_DIR",
+        help="directory a build with --shard ran in",
+    )
+    args = parser.parse_args(argv)
+
+    stats = merge_shards(args.shard_dirs)
+    print(
+        f"Merged {stats['shards']} shards: {stats['pages']} pages,"
+        f" {stats['files']} files, {stats['copied']} copied,"
+        f" {stats['deleted']} deleted"
+    )
@@ -0,0 +1,107 @@
+import re
+
+
+COMMENT_PATTERN = re.compile(r"<!--.*?-->", re.DOTALL)
+# HTML whitespace only; a no-break space is content
+WHITESPACE_PATTERN = re.compile(r"[ \t\n\r\f]+")
+# Elements whose content is written exactly as it is
+RAW_TAG_PATTERN = re.compile(r"<(pre|textarea|script|style)\b", re.IGNORECASE)
+# Tag names are case-insensitive, so </PRE> closes <pre>
+RAW_CLOSING_PATTERNS = {
+    tag: re.compile("</" + tag, re.IGNORECASE)
+    for tag in ("pre", "textarea", "script", "style")
+}
+
+
+class HtmlMinifier:
+    """
+    Collapses insignificant whitespace in HTML written to it in chunks.
+
+    Each run of whitespace in text becomes a single space, also when the
+    run is split across chunks. Tags are passed through unchanged, as is
+    everything inside pre, textarea, script and style elements, so code
+    blocks keep their formatting. A tag split across chunks is held back
+    until it is complete, so every chunk is scanned once.
+
+    Args:
+        write: Callable receiving the minified chunks
+    """
+
+    def __init__(self, write):
+        self.output = write
+        self.pending = ""
+        self.raw_tag = None
+        self.space = False
+
+    def write(self, chunk):
+        if self.pending:
+            chunk = self.pending + chunk
+            self.pending = ""
+
+        out = []
+        position = 0
+        length = len(chunk)
+        while position < length:
+            if self.raw_tag is not None:
+                closing = RAW_CLOSING_PATTERNS[self.raw_tag].search(chunk, position)
+                if closing is None:
+                    # Hold back what could be the start of the closing tag
+                    safe = max(position, length - len(self.raw_tag) - 1)
+                    out.append(chunk[position:safe])
+                    self.pending = chunk[safe:]
+                    break
+                end = closing.start()
+                out.append(chunk[position:end])
+                position = end
+                self.raw_tag = None
+
+            start = chunk.find("<", position)
+            text = chunk[position:] if start == -1 else chunk[position:start]
+            if text:
+                text = WHITESPACE_PATTERN.sub(" ", text)
+                if self.space and text[0] == " ":
+                    text = text[1:]
+                if text:
+                    out.append(text)
+                    self.space = text[-1] == " "
+            if start == -1:
+                break
+
+            end = chunk.find(">", start)
+            if end == -1:
+                self.pending = chunk[start:]
+                break
+            out.append(chunk[start : end + 1])
+            self.space = False
+            match = RAW_TAG_PATTERN.match(chunk, start)
+            if match is not None:
+                self.raw_tag = match.group(1).lower()
+            position = end + 1
+
+        if out:
+            self.output("".join(out))
+
+    def flush(self):
+        # Whatever was held back is written as it is
+        if self.pending:
+            self.output(self.pending)
+            self.pending = ""
+
+
+def minify_html(html):
+    """
+    Minify a complete HTML string, e.g. a template at compile time.
+
+    Comments are removed and whitespace collapsed as by HtmlMinifier.
+
+    Args:
+        html: String containing the markup
+
+    Returns:
+        The minified markup
+    """
+    chunks = []
+    minifier = HtmlMinifier(chunks.append)
+    minifier.write(COMMENT_PATTERN.sub("", html))
+    minifier.flush()
+    return "".join(chunks)
@@ -0,0 +1,75 @@
+import hashlib
+import os
+
+
+class OutputWriter:
+    """
+    Streams chunks into a file, leaving an identical existing file untouched.
+
+    While the new output matches the existing file, chunks are only compared.
+    At the first difference the matching prefix is copied into a temporary
+    file, writing continues there, and close() moves it into place. An
+    unchanged output is never opened for writing, so its mtime is preserved.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.hash = hashlib.sha256()
+        self.size = 0
+        self.out = None
+        self.existing = None
+        try:
+            self.existing = open(path, "rb")
+        except FileNotFoundError:
+            self.out = open(self.tmp_path, "wb")
+
+    def write(self, chunk):
+        data = chunk.encode("utf-8")
+        self.hash.update(data)
+        if self.out is None:
+            if self.existing.read(len(data)) == data:
+                self.size += len(data)
+                return
+            self.start_writing()
+        self.out.write(data)
+        self.size += len(data)
+
+    def start_writing(self):
+        # Copy the part that matched so far, then continue in a new file
+        self.out = open(self.tmp_path, "wb")
+        self.existing.seek(0)
+        remaining = self.size
+        while remaining:
+            block = self.existing.read(min(remaining, 1 << 20))
+            self.out.write(block)
+            remaining -= len(block)
+        self.existing.close()
+        self.existing = None
+
+    def close(self):
+        """
+        Finish the output.
+
+        Returns:
+            True if the file was written, False if it was already identical
+        """
+        if self.out is None:
+            # Identical so far; the existing file must also end here
+            if self.existing.read(1) == b"":
+                self.existing.close()
+                return False
+            self.start_writing()
+        self.out.close()
+        os.replace(self.tmp_path, self.path)
+        return True
+
+    def abort(self):
+        if self.existing is not None:
+            self.existing.close()
+        if self.out is not None:
+            self.out.close()
+            os.remove(self.tmp_path)
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
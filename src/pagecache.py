@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import zlib
+
+
+PAGE_CACHE_DIR = os.path.join(".build_cache", "pages")
+ENTRY_SUFFIX = ".json.z"
+
+
+def page_cache_key(generator, markdown, url_key):
+    """
+    Key of a page's cache entry.
+
+    Args:
+        generator: Digest of the generator that produced it, see
+            manifest.generator_digest
+        markdown: String containing the page's markdown
+        url_key: Key of the UrlRewriter the links were rewritten with
+
+    Returns:
+        Hex digest identifying the rendered body
+    """
+    digest = hashlib.sha256(f"{generator}\0{url_key}\0".encode("utf-8"))
+    digest.update(markdown.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class PageCache:
+    """
+    On-disk cache of rendered page bodies that outlives the output directory.
+
+    Each entry is a zlib-compressed JSON file holding a page's title, body
+    HTML and, if they were counted, its search terms. Lookups touch the
+    entry's mtime, and prune() removes the least recently used entries once
+    the cache is over its size limit. Entries are written atomically, so
+    pool workers can share the directory.
+    """
+
+    def __init__(self, path=PAGE_CACHE_DIR, max_bytes=256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+
+    def entry_path(self, key):
+        return os.path.join(self.path, key[:2], key + ENTRY_SUFFIX)
+
+    def get(self, key):
+        entry_path = self.entry_path(key)
+        try:
+            with open(entry_path, "rb") as f:
+                entry = json.loads(zlib.decompress(f.read()))
+        except (OSError, ValueError, zlib.error):
+            # Missing or corrupt entries are just misses
+            return None
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key, entry):
+        entry_path = self.entry_path(key)
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        data = zlib.compress(json.dumps(entry).encode("utf-8"))
+        tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, entry_path)
+
+    def prune(self):
+        """
+        Remove the least recently used entries until the cache fits its limit.
+
+        Returns:
+            Tuple of (remaining entry count, removed entry count)
+        """
+        entries = []
+        total = 0
+        if os.path.isdir(self.path):
+            for root, _, files in os.walk(self.path):
+                for file in files:
+                    if not file.endswith(ENTRY_SUFFIX):
+                        continue
+                    entry_path = os.path.join(root, file)
+                    stat = os.stat(entry_path)
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry_path))
+                    total += stat.st_size
+
+        entries.sort()
+        removed = 0
+        for _, size, entry_path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(entry_path)
+            total -= size
+            removed += 1
+        return len(entries) - removed, removed
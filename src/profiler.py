@@ -0,0 +1,129 @@
+import contextlib
+import json
+import os
+import time
+
+
+NULL_STAGE = contextlib.nullcontext()
+
+
+def null_stage(name):
+    # Stand-in for BuildProfile.stage when profiling is off
+    return NULL_STAGE
+
+
+class BuildProfile:
+    """
+    Collects per-stage and per-page timings and I/O byte counts for a build.
+
+    Profiles from worker processes are sent back with to_dict and combined
+    with merge.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.pages = {}
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds, calls=1):
+        stage = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+        stage["seconds"] += seconds
+        stage["calls"] += calls
+
+    def add_page(self, path, seconds):
+        self.pages[path] = seconds
+
+    def to_dict(self):
+        return {
+            "stages": self.stages,
+            "pages": self.pages,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+        }
+
+    def merge(self, data):
+        for name, stage in data["stages"].items():
+            self.add_time(name, stage["seconds"], stage["calls"])
+        self.pages.update(data["pages"])
+        self.bytes_read += data["bytes_read"]
+        self.bytes_written += data["bytes_written"]
+
+    def report(self, top=10):
+        """
+        Summarise the build.
+
+        Args:
+            top: Number of slowest pages to list
+
+        Returns:
+            Dict suitable for JSON output
+        """
+        slowest = sorted(self.pages.items(), key=lambda item: item[1], reverse=True)
+        return {
+            "total_seconds": time.perf_counter() - self.start,
+            "page_count": len(self.pages),
+            "page_seconds": sum(self.pages.values()),
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "stages": self.stages,
+            "slowest_pages": [
+                {"path": path, "seconds": seconds} for path, seconds in slowest[:top]
+            ],
+            "pages": dict(sorted(self.pages.items())),
+        }
+
+
+def write_report(report, json_path, text_path):
+    """
+    Write a BuildProfile report as JSON and as plain text.
+
+    Returns:
+        String containing the plain text report
+    """
+    lines = [
+        f"Total build time: {report['total_seconds'] * 1000:.1f} ms",
+        f"Pages generated:  {report['page_count']}"
+        f" ({report['page_seconds'] * 1000:.1f} ms of page time)",
+        f"Bytes read:       {report['bytes_read']}",
+        f"Bytes written:    {report['bytes_written']}",
+    ]
+    if "block_cache" in report:
+        cache = report["block_cache"]
+        lines.append(
+            f"Block cache:      {cache['hits']} hits, {cache['misses']} misses,"
+            f" {cache['evictions']} evictions"
+        )
+    lines.append("")
+    lines.append("Stages:")
+    for name, stage in sorted(
+        report["stages"].items(), key=lambda item: item[1]["seconds"], reverse=True
+    ):
+        lines.append(
+            f"  {name:<24} {stage['seconds'] * 1000:10.1f} ms"
+            f" {stage['calls']:8} calls"
+        )
+    lines.append("")
+    lines.append("Slowest pages:")
+    for page in report["slowest_pages"]:
+        lines.append(f"  {page['seconds'] * 1000:10.1f} ms  {page['path']}")
+    text = "\n".join(lines) + "\n"
+
+    for path in (json_path, text_path):
+        report_dir = os.path.dirname(path)
+        if report_dir:
+            os.makedirs(report_dir, exist_ok=True)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    with open(text_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return text
@@ -0,0 +1,169 @@
+import json
+import os
+import re
+import shutil
+
+from jsonfile import load_json, write_json_atomic
+from outputwriter import OutputWriter
+
+
+SEARCH_CACHE_PATH = os.path.join(".build_cache", "search.json")
+SEARCH_DIR_NAME = "search-index"
+PAGES_FILE_NAME = "pages.json"
+# Terms are sharded by their first characters, so a query loads one shard
+PREFIX_LENGTH = 2
+TERM_PATTERN = re.compile(r"\w+")
+MIN_TERM_LENGTH = 2
+
+
+def add_text_terms(terms, text):
+    """
+    Count the search terms in a piece of text.
+
+    Args:
+        terms: Dict of term to count, updated in place
+        text: Plain text, e.g. the value of a LeafNode
+    """
+    for match in TERM_PATTERN.finditer(text):
+        term = match.group().lower()
+        if len(term) >= MIN_TERM_LENGTH:
+            terms[term] = terms.get(term, 0) + 1
+
+
+def add_node_terms(terms, node):
+    # Leaf values are the TextNode texts of the block, already split out of
+    # the markdown by text_to_textnodes
+    if node.children is None:
+        if node.value:
+            add_text_terms(terms, node.value)
+        return
+    for child in node.children:
+        add_node_terms(terms, child)
+
+
+def shard_name(term):
+    """
+    Name of the shard file holding a term.
+
+    The first PREFIX_LENGTH characters of the term are used as they are if
+    they are ASCII letters and digits, and hex encoded (after "_") otherwise.
+    """
+    prefix = term[:PREFIX_LENGTH]
+    if prefix.isascii() and prefix.isalnum():
+        return prefix
+    return "_" + prefix.encode("utf-8").hex()
+
+
+class SearchIndex:
+    """
+    Search terms of every page, written out as an inverted index.
+
+    Pages are keyed by output path and hold their title and term counts.
+    The index is kept in the build cache, so pages skipped by the build
+    manifest keep their terms without being read again.
+    """
+
+    def __init__(self, path=SEARCH_CACHE_PATH):
+        self.path = path
+        self.pages = {}
+        if path is not None:
+            self.load()
+
+    def load(self):
+        # Missing or corrupt just means the pages are indexed again
+        self.pages = load_json(self.path, {})
+
+    def save(self):
+        write_json_atomic(self.path, self.pages, sort_keys=True)
+
+    def has_page(self, dest_path):
+        return dest_path in self.pages
+
+    def add_page(self, dest_path, title, terms):
+        self.pages[dest_path] = {"title": title, "terms": terms}
+
+    def merge(self, pages):
+        # Pages indexed in a worker process
+        self.pages.update(pages)
+
+    def retain(self, dest_paths):
+        # Forget pages that are no longer part of the site
+        keep = set(dest_paths)
+        self.pages = {
+            dest_path: page
+            for dest_path, page in self.pages.items()
+            if dest_path in keep
+        }
+
+    def write(self, output_dir):
+        """
+        Write the page list and the term shards under the output directory.
+
+        pages.json holds the prefix length and a list of [url, title] pairs,
+        where the URL is relative to the site root. The position of a page in
+        that list is its ID. Each shard maps its terms to a list of
+        [page ID, count] pairs, most frequent first. Unchanged files are left
+        untouched and shards that are no longer needed are removed.
+
+        Args:
+            output_dir: Path to the generated site
+
+        Returns:
+            Number of shard files
+        """
+        search_dir = os.path.join(output_dir, SEARCH_DIR_NAME)
+        os.makedirs(search_dir, exist_ok=True)
+
+        pages = []
+        shards = {}
+        for page_id, dest_path in enumerate(sorted(self.pages)):
+            page = self.pages[dest_path]
+            pages.append([page_url(dest_path, output_dir), page["title"]])
+            for term, count in page["terms"].items():
+                shard = shards.setdefault(shard_name(term), {})
+                shard.setdefault(term, []).append([page_id, count])
+
+        write_json(
+            os.path.join(search_dir, PAGES_FILE_NAME),
+            {"prefix_length": PREFIX_LENGTH, "pages": pages},
+        )
+        for name, shard in shards.items():
+            for postings in shard.values():
+                postings.sort(key=lambda posting: (-posting[1], posting[0]))
+            write_json(os.path.join(search_dir, f"{name}.json"), shard)
+
+        for file in os.listdir(search_dir):
+            name, ext = os.path.splitext(file)
+            if ext == ".json" and file != PAGES_FILE_NAME and name not in shards:
+                os.remove(os.path.join(search_dir, file))
+        return len(shards)
+
+
+def page_url(dest_path, output_dir):
+    # docs/blog/tom/index.html -> blog/tom/
+    url = os.path.relpath(dest_path, output_dir).replace(os.sep, "/")
+    if url == "index.html":
+        return ""
+    if url.endswith("/index.html"):
+        return url[: -len("index.html")]
+    return url
+
+
+def write_json(path, data):
+    writer = OutputWriter(path)
+    try:
+        writer.write(json.dumps(data, sort_keys=True, separators=(",", ":")))
+        writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+
+
+def remove_search_index(output_dir, path=SEARCH_CACHE_PATH):
+    # A build without a search index should not leave an outdated one behind.
+    # The directory is the index's own, so its compressed copies go with it.
+    search_dir = os.path.join(output_dir, SEARCH_DIR_NAME)
+    if os.path.isdir(search_dir):
+        shutil.rmtree(search_dir)
+    if os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,264 @@
+import argparse
+import functools
+import os
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from blockcache import BlockCache
+from main import (
+    CONTENT_DIR,
+    OUTPUT_DIR,
+    STATIC_DIR,
+    TEMPLATE_PATH,
+    add_build_arguments,
+    build,
+)
+from manifest import BuildManifest
+from pagecache import PageCache
+from search import SearchIndex
+from snapshot import diff_snapshots, snapshot_tree
+from template import LAYOUT_NAME
+from utils import discover_pages, generate_pages, sync_directory
+
+
+RELOAD_PATH = "/__livereload"
+RELOAD_SCRIPT = (
+    "<script>"
+    f'new EventSource("{RELOAD_PATH}").onmessage = () => location.reload();'
+    "</script>"
+)
+
+
+def is_page_source(path):
+    return path.startswith(CONTENT_DIR + os.sep) and path.endswith(".md")
+
+
+def is_template_source(path, templates):
+    # A template the last build read, or a directory's layout, new or not
+    return path in templates or os.path.basename(path) == LAYOUT_NAME
+
+
+class LiveReload:
+    """Build counter that event-stream clients wait on."""
+
+    def __init__(self):
+        self.generation = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.generation += 1
+            self.condition.notify_all()
+
+    def wait(self, generation, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.generation != generation, timeout)
+            return self.generation
+
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == RELOAD_PATH:
+            self.send_reload_events()
+            return
+
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and self.path.split("?", 1)[0].endswith("/"):
+            path = os.path.join(path, "index.html")
+        if not (path.endswith(".html") and os.path.isfile(path)):
+            super().do_GET()
+            return
+
+        with open(path, "rb") as f:
+            html = f.read()
+        # Inject the reload client just before </body>
+        script = RELOAD_SCRIPT.encode("utf-8")
+        position = html.rfind(b"</body>")
+        if position == -1:
+            html += script
+        else:
+            html = html[:position] + script + html[position:]
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(html)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(html)
+
+    def send_reload_events(self):
+        live_reload = self.server.live_reload
+        # Taken first, so a build finishing while the client connects counts
+        generation = live_reload.generation
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+
+        try:
+            while True:
+                new_generation = live_reload.wait(generation, timeout=15)
+                if new_generation != generation:
+                    self.wfile.write(b"data: reload\n\n")
+                else:
+                    # Keep idle connections from timing out
+                    self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+                generation = new_generation
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+
+class Watcher:
+    """
+    Polls the site sources and rebuilds what changed.
+
+    A page, template or layout change regenerates the pages through the
+    build manifest, so only pages whose inputs changed are rendered, and
+    the outputs of removed pages are deleted. A static change re-syncs the
+    static directory. The rebuilds use the same build options as the
+    initial build, and keep the block cache between them.
+
+    Args:
+        args: Parsed build options
+        templates: Paths of the template files the initial build read;
+            includes and extends can reach any file next to the root template
+    """
+
+    def __init__(self, args, templates):
+        self.args = args
+        self.templates = set(templates)
+        self.cache = BlockCache(args.block_cache) if args.block_cache > 0 else None
+        self.page_cache = None
+        if args.page_cache > 0:
+            self.page_cache = PageCache(max_bytes=args.page_cache * 1024 * 1024)
+        self.snapshot = self.sweep()
+
+    def sweep(self):
+        snapshot = {}
+        for path in (CONTENT_DIR, STATIC_DIR, TEMPLATE_PATH, *self.templates):
+            snapshot_tree(path, snapshot)
+        return snapshot
+
+    def poll(self):
+        """
+        Sweep once and rebuild anything affected.
+
+        Returns:
+            True if the output changed
+        """
+        snapshot = self.sweep()
+        changed, removed = diff_snapshots(self.snapshot, snapshot)
+        self.snapshot = snapshot
+        if not changed and not removed:
+            return False
+
+        manifest = BuildManifest()
+        if any(path.startswith(STATIC_DIR + os.sep) for path in changed + removed):
+            manifest.static_files, _, _, _ = sync_directory(
+                STATIC_DIR,
+                OUTPUT_DIR,
+                manifest.static_files,
+                self.args.hash_static,
+                self.args.link_static,
+            )
+        try:
+            if any(
+                is_page_source(path) or is_template_source(path, self.templates)
+                for path in changed + removed
+            ):
+                self.generate(manifest)
+            else:
+                # Only the static files changed; keep every page's entry
+                manifest.seen.update(manifest.entries)
+        except Exception as e:
+            # Keep watching; the writer will fix the page and save again
+            print(f"Build failed: {e}")
+        finally:
+            manifest.save()
+        return True
+
+    def generate(self, manifest):
+        args = self.args
+        index = SearchIndex() if args.search_index else None
+        try:
+            stats = generate_pages(
+                discover_pages(CONTENT_DIR, OUTPUT_DIR),
+                TEMPLATE_PATH,
+                args.basepath,
+                manifest=manifest,
+                jobs=args.jobs,
+                cache=self.cache,
+                index=index,
+                page_cache=self.page_cache,
+                content_dir=CONTENT_DIR,
+                minify=args.minify,
+            )
+            for dest_path in manifest.remove_stale_outputs(OUTPUT_DIR):
+                print(f"Deleted: {dest_path}")
+        finally:
+            if index is not None:
+                index.save()
+        if index is not None:
+            index.write(OUTPUT_DIR)
+        if self.page_cache is not None:
+            self.page_cache.prune()
+
+        # Watch the templates this rebuild read, with their stats from the
+        # read, so one newly included is not taken for a change next poll
+        templates = set(stats["templates"])
+        for path in self.templates - templates:
+            if not path.startswith(CONTENT_DIR + os.sep) and path != TEMPLATE_PATH:
+                self.snapshot.pop(path, None)
+        self.templates = templates
+        self.snapshot.update(stats["templates"])
+
+
+def serve(argv=None):
+    parser = argparse.ArgumentParser(description="Build and serve the site.")
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="rebuild on changes and reload open browsers",
+    )
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.05,
+        metavar="SECONDS",
+        help="how often to poll for changes",
+    )
+    add_build_arguments(parser)
+    args = parser.parse_args(argv)
+    # The dev server always serves the whole site from the root, under plain
+    # names and uncompressed, as the rebuilds write it
+    args.basepath = "/"
+    args.fingerprint = False
+    args.precompress = False
+    args.shard = None
+
+    _, templates = build(args)
+
+    handler = functools.partial(LiveReloadHandler, directory=OUTPUT_DIR)
+    server = ThreadingHTTPServer(("", args.port), handler)
+    server.daemon_threads = True
+    server.live_reload = LiveReload()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(f"Serving {OUTPUT_DIR} at http://localhost:{args.port}/")
+
+    try:
+        if not args.watch:
+            thread.join()
+            return
+        watcher = Watcher(args, templates)
+        while True:
+            time.sleep(args.interval)
+            if watcher.poll():
+                server.live_reload.notify()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
@@ -0,0 +1,128 @@
+import hashlib
+import os
+
+from jsonfile import load_json, write_json_atomic
+
+
+def snapshot_tree(path, snapshot=None, directories=False, files=True, suffix=""):
+    """
+    Record the size and mtime of every file under a path.
+
+    Uses os.scandir, so each directory costs one listing and the stat
+    results usually come from the same system call.
+
+    Args:
+        path: File or directory to sweep
+        snapshot: Optional dict to add the entries to
+        directories: Also record every directory, the path itself included;
+            a directory's mtime changes when an entry is added, removed or
+            replaced in it
+        files: Record the files
+        suffix: Only record files whose name ends with this
+
+    Returns:
+        Dict of path to (size, mtime_ns)
+    """
+    if snapshot is None:
+        snapshot = {}
+    if os.path.isfile(path):
+        if files and path.endswith(suffix):
+            stat = os.stat(path)
+            snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+    if not os.path.isdir(path):
+        return snapshot
+
+    if directories:
+        stat = os.stat(path)
+        snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                snapshot_tree(entry.path, snapshot, directories, files, suffix)
+            elif files and entry.is_file() and entry.name.endswith(suffix):
+                stat = entry.stat()
+                snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+
+def diff_snapshots(old, new):
+    """
+    Compare two snapshots.
+
+    Returns:
+        Tuple of (changed or added paths, removed paths), both sorted
+    """
+    changed = []
+    for path, stat in new.items():
+        if old.get(path) != stat:
+            changed.append(path)
+    removed = []
+    for path in old:
+        if path not in new:
+            removed.append(path)
+    return sorted(changed), sorted(removed)
+
+
+def digest_stats(stats):
+    """
+    Hash the paths of a snapshot with their sizes and mtimes.
+
+    Args:
+        stats: Dict of path to (size, mtime_ns)
+
+    Returns:
+        Hex digest, independent of the order of the dict
+    """
+    lines = [
+        f"{path}\0{size}\0{mtime_ns}\n"
+        for path, (size, mtime_ns) in sorted(stats.items())
+    ]
+    return hashlib.sha256("".join(lines).encode()).hexdigest()
+
+
+def stat_paths(paths):
+    """
+    Stat a list of paths, without listing any directory.
+
+    Returns:
+        Dict of path to (size, mtime_ns), or None if a path is gone
+    """
+    stats = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        stats[path] = (stat.st_size, stat.st_mtime_ns)
+    return stats
+
+
+def load_snapshot(path):
+    """
+    Read a snapshot saved by save_snapshot.
+
+    Returns:
+        Tuple of (settings, hex digest, list of paths), or (None, None, [])
+        if there is none
+    """
+    data = load_json(path, {})
+    return data.get("settings"), data.get("digest"), data.get("paths", [])
+
+
+def save_snapshot(path, settings, stats):
+    """
+    Persist a snapshot with the settings of the build it was taken for.
+
+    The paths are stored with a digest of their stats, so checking them
+    later takes one stat call per path and no directory listings.
+
+    Args:
+        path: Path to write the snapshot to
+        settings: JSON-serializable build settings
+        stats: Dict of path to (size, mtime_ns), e.g. from snapshot_tree
+    """
+    write_json_atomic(
+        path,
+        {"settings": settings, "digest": digest_stats(stats), "paths": sorted(stats)},
+    )
@@ -0,0 +1,387 @@
+import hashlib
+import json
+import os
+import re
+
+from minify import HtmlMinifier, minify_html
+
+SLOT_PATTERN = re.compile(r"\{\{ (Title|Content) \}\}")
+# {% include "path" %}, {% extends "path" %}, {% block name %} and
+# {% endblock %}; paths are relative to the directory of the root template
+TAG_PATTERN = re.compile(
+    r'\{% (?:(include|extends) "([^"]+)"|block (\w+)|(endblock)) %\}'
+)
+# A content directory holding this file renders its pages with it
+LAYOUT_NAME = "_template.html"
+# Root-relative href and src attribute values in template markup
+ATTRIBUTE_URL_PATTERN = re.compile(r'((?:href|src)=")(/[^"]*)')
+# The path of a URL, before any query string or fragment
+URL_PATH_PATTERN = re.compile(r"[^?#]*")
+
+
+def rewrite_url(url, basepath):
+    """
+    Apply the basepath to a single root-relative URL.
+
+    Args:
+        url: URL of a link or image
+        basepath: Root path the site is served from, ending in "/"
+
+    Returns:
+        The URL with its leading "/" replaced by basepath, other URLs unchanged
+    """
+    if url is not None and url.startswith("/"):
+        return basepath + url[1:]
+    return url
+
+
+class UrlRewriter:
+    """
+    Rewrites root-relative URLs for the site's basepath and asset names.
+
+    Args:
+        basepath: Root path the site is served from, ending in "/"
+        assets: Optional dict of root-relative asset path to the path it is
+            published under, e.g. {"/index.css": "/index.1a2b3c4d5e.css"}
+    """
+
+    def __init__(self, basepath="/", assets=None):
+        self.basepath = basepath
+        self.assets = assets or {}
+        if self.assets:
+            encoded = json.dumps(self.assets, sort_keys=True).encode("utf-8")
+            digest = hashlib.sha256(encoded).hexdigest()[:16]
+            self.key = f"{basepath}#{digest}"
+        else:
+            self.key = basepath
+
+    def rewrite(self, url):
+        """
+        Rewrite a single link or image URL.
+
+        Returns:
+            The URL under its published asset name and the basepath, other
+            URLs unchanged
+        """
+        if url is None or not url.startswith("/"):
+            return url
+        if self.assets:
+            end = URL_PATH_PATTERN.match(url).end()
+            path = url[:end]
+            url = self.assets.get(path, path) + url[end:]
+        return rewrite_url(url, self.basepath)
+
+    def rewrite_html(self, html):
+        # Rewrite the root-relative href and src attributes in markup
+        return ATTRIBUTE_URL_PATTERN.sub(
+            lambda match: match.group(1) + self.rewrite(match.group(2)), html
+        )
+
+
+class CompiledTemplate:
+    """
+    A page template split into static fragments and named slots.
+
+    The static fragments have their URLs rewritten once at compile time, so
+    rendering a page is a single join with the slot values filled in. Slot
+    values are inserted as they are; markdown_to_html_node rewrites the URLs
+    it builds with the same UrlRewriter, available as the urls attribute.
+
+    With minify, comments and extra whitespace are removed from the
+    template once here, and the slot values are minified while they are
+    streamed.
+    """
+
+    def __init__(self, template_text, basepath="/", assets=None, minify=False):
+        self.urls = UrlRewriter(basepath, assets)
+        self.minify = minify
+        if minify:
+            template_text = minify_html(template_text)
+        # Identifies the resolved markup, partials and parent layouts included
+        digest = hashlib.sha256(template_text.encode("utf-8"))
+        if minify:
+            # Minified slot values change the output of the same markup
+            digest.update(b"\0minify")
+        self.source_hash = digest.hexdigest()
+        self.parts = []
+        self.slots = []
+
+        position = 0
+        for match in SLOT_PATTERN.finditer(template_text):
+            self.parts.append(
+                self.urls.rewrite_html(template_text[position : match.start()])
+            )
+            self.slots.append((len(self.parts), match.group(1)))
+            self.parts.append(None)
+            position = match.end()
+        self.parts.append(self.urls.rewrite_html(template_text[position:]))
+
+    def render(self, **values):
+        """
+        Fill the slots and return the page.
+
+        Args:
+            **values: Slot name to an HTML string or an HTMLNode
+
+        Returns:
+            String containing the rendered page
+        """
+        chunks = []
+        self.render_into(chunks.append, **values)
+        return "".join(chunks)
+
+    def render_into(self, write, **values):
+        """
+        Stream the page as chunks without building it in memory first.
+
+        Args:
+            write: Callable receiving each chunk, e.g. list.append or file.write
+            **values: Slot name to an HTML string or an HTMLNode
+        """
+        if self.minify:
+            # The static parts pass through too, so that the minifier knows
+            # whether a slot is inside a pre element
+            minifier = HtmlMinifier(write)
+            write = minifier.write
+        slot_names = dict(self.slots)
+        for index, part in enumerate(self.parts):
+            if part is not None:
+                if part:
+                    write(part)
+                continue
+            value = values[slot_names[index]]
+            if isinstance(value, str):
+                write(value)
+            else:
+                value.render_into(write)
+        if self.minify:
+            minifier.flush()
+
+
+class Block:
+    """A named {% block %} of a template and the nodes inside it."""
+
+    __slots__ = ("name", "children")
+
+    def __init__(self, name, children):
+        self.name = name
+        self.children = children
+
+
+def parse_template(template_text, template_path):
+    """
+    Split template markup into text, include and block nodes.
+
+    Args:
+        template_text: String containing the template markup
+        template_path: Path of the template, for error messages
+
+    Returns:
+        Tuple of (path of the extended template or None, list of nodes),
+        where a node is a string of markup, an ("include", path) tuple or a
+        Block
+
+    Raises:
+        ValueError: If the blocks are unbalanced or extends is not first
+    """
+    extends = None
+    nodes = []
+    stack = []
+    position = 0
+    for match in TAG_PATTERN.finditer(template_text):
+        if match.start() > position:
+            nodes.append(template_text[position : match.start()])
+        position = match.end()
+
+        keyword, path, block_name, endblock = match.groups()
+        if keyword == "extends":
+            if nodes or stack or extends is not None:
+                raise ValueError(f"{template_path}: extends must come first")
+            extends = path
+        elif keyword == "include":
+            nodes.append(("include", path))
+        elif block_name is not None:
+            block = Block(block_name, [])
+            nodes.append(block)
+            stack.append(nodes)
+            nodes = block.children
+        else:
+            if not stack:
+                raise ValueError(f"{template_path}: endblock without a block")
+            nodes = stack.pop()
+    if stack:
+        raise ValueError(f"{template_path}: block is not closed")
+    if position < len(template_text):
+        nodes.append(template_text[position:])
+    return extends, nodes
+
+
+def collect_blocks(nodes, blocks):
+    # Every block of a template by name, including nested ones
+    for node in nodes:
+        if isinstance(node, Block):
+            blocks[node.name] = node
+            collect_blocks(node.children, blocks)
+    return blocks
+
+
+def override_blocks(nodes, blocks):
+    # Replace blocks of a parent template with a child's definitions
+    result = []
+    for node in nodes:
+        if isinstance(node, Block):
+            node = blocks.get(node.name, node)
+            node = Block(node.name, override_blocks(node.children, blocks))
+        result.append(node)
+    return result
+
+
+def flatten_nodes(nodes, chunks):
+    for node in nodes:
+        if isinstance(node, Block):
+            flatten_nodes(node.children, chunks)
+        else:
+            chunks.append(node)
+    return chunks
+
+
+class TemplateLoader:
+    """
+    Resolves templates, their includes and the layouts they extend.
+
+    Each file is read and parsed once, however many layouts use it. The
+    size and mtime of every file read are kept in stats, so a caller can
+    tell later whether any template the build used has changed.
+
+    Args:
+        root_dir: Directory include and extends paths are relative to
+    """
+
+    def __init__(self, root_dir="."):
+        self.root_dir = root_dir
+        self.parsed = {}
+        self.stats = {}
+        self.resolving = []
+
+    def parse(self, template_path):
+        if template_path not in self.parsed:
+            with open(template_path, "r", encoding="utf-8") as f:
+                # Taken from the open file, so an edit after the read is seen
+                stat = os.fstat(f.fileno())
+                self.parsed[template_path] = parse_template(f.read(), template_path)
+            path = os.path.normpath(template_path)
+            self.stats[path] = (stat.st_size, stat.st_mtime_ns)
+        return self.parsed[template_path]
+
+    def resolve(self, template_path):
+        """
+        Expand a template's includes and apply it to the layout it extends.
+
+        Returns:
+            List of nodes with no includes left, blocks kept so that a
+            child layout can still override them
+        """
+        if template_path in self.resolving:
+            raise ValueError(f"Template includes itself: {template_path}")
+        self.resolving.append(template_path)
+        try:
+            extends, nodes = self.parse(template_path)
+            nodes = self.expand_includes(nodes)
+            if extends is not None:
+                blocks = collect_blocks(nodes, {})
+                parent = self.resolve(os.path.join(self.root_dir, extends))
+                nodes = override_blocks(parent, blocks)
+        finally:
+            self.resolving.pop()
+        return nodes
+
+    def expand_includes(self, nodes):
+        result = []
+        for node in nodes:
+            if isinstance(node, tuple):
+                result.extend(self.resolve(os.path.join(self.root_dir, node[1])))
+            elif isinstance(node, Block):
+                result.append(Block(node.name, self.expand_includes(node.children)))
+            else:
+                result.append(node)
+        return result
+
+    def source(self, template_path):
+        # The resolved markup, with only the {{ }} slots left
+        return "".join(flatten_nodes(self.resolve(template_path), []))
+
+
+class Layouts:
+    """
+    The compiled template of every content directory, for one build.
+
+    A directory uses the _template.html in it if there is one, and its
+    parent directory's layout otherwise; the content directory falls back
+    to the root template. Each layout is compiled once, and each directory
+    is resolved once, so looking up a page's layout is a dict lookup.
+
+    Args:
+        template_path: Path to the root template
+        content_dir: Path to the content directory, or None to render every
+            page with the root template
+        basepath: Root path the site is served from
+        assets: Optional dict of asset path to fingerprinted path
+        minify: Minify the templates and the pages rendered with them
+    """
+
+    def __init__(
+        self, template_path, content_dir=None, basepath="/", assets=None, minify=False
+    ):
+        self.template_path = template_path
+        if content_dir is not None:
+            content_dir = os.path.normpath(content_dir)
+        self.content_dir = content_dir
+        self.basepath = basepath
+        self.assets = assets
+        self.minify = minify
+        self.loader = TemplateLoader(os.path.dirname(template_path) or ".")
+        self.compiled = {}
+        self.directories = {}
+        self.root = self.compile(template_path)
+
+    def compile(self, template_path):
+        if template_path not in self.compiled:
+            self.compiled[template_path] = CompiledTemplate(
+                self.loader.source(template_path),
+                self.basepath,
+                self.assets,
+                self.minify,
+            )
+        return self.compiled[template_path]
+
+    def layout_path(self, directory):
+        if directory in self.directories:
+            return self.directories[directory]
+
+        parent = os.path.dirname(directory)
+        candidate = os.path.join(directory, LAYOUT_NAME)
+        if self.content_dir is None:
+            path = self.template_path
+        elif os.path.isfile(candidate):
+            path = candidate
+        elif directory == self.content_dir or parent == directory:
+            path = self.template_path
+        else:
+            path = self.layout_path(parent)
+        self.directories[directory] = path
+        return path
+
+    def for_page(self, source_path):
+        """
+        Find the layout of a page.
+
+        Returns:
+            Tuple of (layout path, CompiledTemplate)
+        """
+        path = self.layout_path(os.path.dirname(os.path.normpath(source_path)))
+        return path, self.compile(path)
+
+
+def load_template(template_path, basepath="/", assets=None, minify=False):
+    loader = TemplateLoader(os.path.dirname(template_path) or ".")
+    return CompiledTemplate(loader.source(template_path), basepath, assets, minify)
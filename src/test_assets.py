@@ -0,0 +1,188 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import assets as assets_module
+from assets import AssetFingerprinter, fingerprint_path
+from manifest import BuildManifest, hash_file
+from utils import generate_pages_recursive, sync_directory
+
+
+class TestFingerprintPath(unittest.TestCase):
+    def test_hash_before_extension(self):
+        self.assertEqual(
+            fingerprint_path("index.css", "abcdef0123456789"), "index.abcdef0123.css"
+        )
+        self.assertEqual(
+            fingerprint_path(os.path.join("images", "a.b.png"), "0" * 64),
+            os.path.join("images", "a.b.0000000000.png"),
+        )
+
+
+class TestAssetFingerprinting(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+        self.write(os.path.join(self.static, "favicon.ico"), "ico")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def sync(self, previous_files=None, known_hashes=None):
+        fingerprinter = AssetFingerprinter(
+            self.static, known_hashes, os.path.join(self.tmp.name, "staging")
+        )
+        synced, _, _, _ = sync_directory(
+            self.static, self.docs, previous_files, rename=fingerprinter.rename
+        )
+        return fingerprinter, synced
+
+    def test_sync_renames_assets(self):
+        css_hash = hash_file(os.path.join(self.static, "index.css"))[:10]
+        png_hash = hash_file(os.path.join(self.static, "images", "a.png"))[:10]
+        fingerprinter, synced = self.sync()
+        self.assertEqual(
+            sorted(synced),
+            [
+                "favicon.ico",
+                os.path.join("images", f"a.{png_hash}.png"),
+                f"index.{css_hash}.css",
+            ],
+        )
+        self.assertEqual(
+            fingerprinter.assets,
+            {
+                "/index.css": f"/index.{css_hash}.css",
+                "/images/a.png": f"/images/a.{png_hash}.png",
+            },
+        )
+        for rel_path in synced:
+            self.assertTrue(os.path.isfile(os.path.join(self.docs, rel_path)))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.css")))
+
+    def test_changed_asset_replaces_old_name(self):
+        first, synced = self.sync()
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        second, _ = self.sync(synced)
+        self.assertNotEqual(first.assets["/index.css"], second.assets["/index.css"])
+        self.assertFalse(
+            os.path.exists(os.path.join(self.docs, first.assets["/index.css"][1:]))
+        )
+        self.assertTrue(
+            os.path.exists(os.path.join(self.docs, second.assets["/index.css"][1:]))
+        )
+
+    def test_unchanged_assets_are_not_read(self):
+        first, synced = self.sync()
+        with mock.patch.object(assets_module, "hash_file") as hash_file:
+            second, _ = self.sync(synced, first.hashes)
+        hash_file.assert_not_called()
+        self.assertEqual(second.assets, first.assets)
+
+        # Same size, new mtime: hashed again
+        os.utime(os.path.join(self.static, "images", "a.png"), ns=(0, 0))
+        with mock.patch.object(
+            assets_module, "hash_file", wraps=assets_module.hash_file
+        ) as hash_file:
+            third, _ = self.sync(synced, second.hashes)
+        hash_file.assert_called_once()
+        self.assertEqual(third.assets, first.assets)
+
+    def test_stylesheet_urls_are_rewritten(self):
+        os.makedirs(os.path.join(self.static, "fonts"))
+        self.write(os.path.join(self.static, "fonts", "f.woff2"), "font")
+        self.write(
+            os.path.join(self.static, "index.css"),
+            "a { background: url(images/a.png) }\n"
+            "@font-face { src: url('/fonts/f.woff2?v=1#x') }\n"
+            'b { background: url("data:image/png;base64,AA") }\n'
+            "i { background: url(missing.png) url(https://x.org/a.png) }\n",
+        )
+        fingerprinter, _ = self.sync()
+        assets = fingerprinter.assets
+        with open(os.path.join(self.docs, assets["/index.css"][1:])) as f:
+            css = f.read()
+        self.assertEqual(
+            css,
+            f"a {{ background: url({assets['/images/a.png'][1:]}) }}\n"
+            f"@font-face {{ src: url('{assets['/fonts/f.woff2']}?v=1#x') }}\n"
+            'b { background: url("data:image/png;base64,AA") }\n'
+            "i { background: url(missing.png) url(https://x.org/a.png) }\n",
+        )
+
+        # A changed image renames the stylesheet that references it
+        self.write(os.path.join(self.static, "images", "a.png"), "new png")
+        second, _ = self.sync()
+        self.assertNotEqual(second.assets["/index.css"], assets["/index.css"])
+
+    def test_stylesheet_relative_to_its_directory(self):
+        os.makedirs(os.path.join(self.static, "css"))
+        self.write(
+            os.path.join(self.static, "css", "site.css"),
+            "@import url(../index.css);\na { background: url(../images/a.png) }",
+        )
+        self.write(os.path.join(self.static, "index.css"), "@import url(css/site.css);")
+        fingerprinter, _ = self.sync()
+        assets = fingerprinter.assets
+        path = os.path.join(self.docs, assets["/css/site.css"][1:])
+        with open(path) as f:
+            css = f.read()
+        # The import cycle keeps its plain URL rather than recursing forever
+        self.assertEqual(
+            css,
+            "@import url(../index.css);\n"
+            f"a {{ background: url(..{assets['/images/a.png']}) }}",
+        )
+        with open(os.path.join(self.docs, assets["/index.css"][1:])) as f:
+            self.assertEqual(f.read(), f"@import url({assets['/css/site.css'][1:]});")
+
+    def test_save(self):
+        fingerprinter, _ = self.sync()
+        path = os.path.join(self.tmp.name, "asset-manifest.json")
+        fingerprinter.save(path)
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), fingerprinter.assets)
+
+    def test_pages_link_to_fingerprinted_assets(self):
+        content = os.path.join(self.tmp.name, "content")
+        template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(content)
+        self.write(os.path.join(content, "index.md"), "# Hi\n\n![a](/images/a.png)")
+        self.write(template, '<link href="/index.css">{{ Title }}{{ Content }}')
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+
+        def build():
+            fingerprinter, _ = self.sync(manifest.static_files)
+            generate_pages_recursive(
+                content,
+                template,
+                self.docs,
+                "/site/",
+                manifest=manifest,
+                assets=fingerprinter.assets,
+            )
+            with open(os.path.join(self.docs, "index.html"), encoding="utf-8") as f:
+                return fingerprinter.assets, f.read()
+
+        assets, html = build()
+        self.assertIn(f'href="/site{assets["/index.css"]}"', html)
+        self.assertIn(f'src="/site{assets["/images/a.png"]}"', html)
+
+        # A changed asset name makes the page stale even though its source is not
+        self.write(os.path.join(self.static, "images", "a.png"), "new png")
+        assets, html = build()
+        self.assertIn(f'src="/site{assets["/images/a.png"]}"', html)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+from blockcache import BlockCache
+from utils import BlockType, markdown_to_html_node
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_get_and_put(self):
+        cache = BlockCache(2)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(
+            cache.stats(), {"hits": 1, "misses": 1, "evictions": 0, "size": 1}
+        )
+
+    def test_least_recently_used_is_evicted(self):
+        cache = BlockCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertEqual(list(cache.entries), ["a", "c"])
+        self.assertEqual(cache.evictions, 1)
+
+    def test_merge_stats(self):
+        cache = BlockCache()
+        cache.merge_stats({"hits": 3, "misses": 2, "evictions": 1})
+        cache.merge_stats({"hits": 1, "misses": 0, "evictions": 0})
+        self.assertEqual((cache.hits, cache.misses, cache.evictions), (4, 2, 1))
+
+    def test_markdown_to_html_node_reuses_blocks(self):
+        bio = "Written by **Bilbo**, see [more](/about)."
+        first = f"# One\n\n{bio}\n\n- a\n- b"
+        second = f"# Two\n\n{bio}\n\n- a\n- b"
+        cache = BlockCache()
+
+        self.assertEqual(
+            markdown_to_html_node(first, cache).to_html(),
+            markdown_to_html_node(first).to_html(),
+        )
+        self.assertEqual(cache.misses, 3)
+        self.assertEqual(
+            markdown_to_html_node(second, cache).to_html(),
+            markdown_to_html_node(second).to_html(),
+        )
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+        self.assertIn((BlockType.PARAGRAPH, bio, None), cache.entries)
+
+
+if __name__ == "__main__":
+    unittest.main()
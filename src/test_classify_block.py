@@ -0,0 +1,88 @@
+import random
+import re
+import unittest
+
+from utils import (
+    BlockType,
+    classify_block,
+    ordered_list_to_html_node,
+    quote_to_html_node,
+    unordered_list_to_html_node,
+)
+
+
+def block_to_block_type_by_passes(block):
+    # The original multi-pass classifier, kept as the reference implementation
+    lines = block.split("\n")
+    if block.startswith("```\n") and block.rstrip().endswith("```"):
+        return BlockType.CODE
+    if re.match(r"^#{1,6} ", block):
+        return BlockType.HEADING
+    if all(line.startswith(">") for line in lines):
+        return BlockType.QUOTE
+    if all(line.startswith("* ") or line.startswith("- ") for line in lines):
+        return BlockType.UNORDERED_LIST
+    if all(line.startswith(f"{i}. ") for i, line in enumerate(lines, 1)):
+        return BlockType.ORDERED_LIST
+    return BlockType.PARAGRAPH
+
+
+CONVERTERS = {
+    BlockType.QUOTE: quote_to_html_node,
+    BlockType.UNORDERED_LIST: unordered_list_to_html_node,
+    BlockType.ORDERED_LIST: ordered_list_to_html_node,
+}
+
+LINE_STARTS = ["> ", ">", ">  ", "* ", "- ", "*", "1. ", "2. ", "3. ", "1.", "# ", ""]
+LINE_TEXTS = ["text", "**bold** text", " spaced", "", "`code`"]
+
+
+class TestClassifyBlock(unittest.TestCase):
+    def test_examples(self):
+        self.assertEqual(classify_block("```\ncode\n```"), (BlockType.CODE, None))
+        self.assertEqual(classify_block("### Heading"), (BlockType.HEADING, None))
+        self.assertEqual(classify_block("####### no"), (BlockType.PARAGRAPH, None))
+        self.assertEqual(
+            classify_block(">  quote\n>more"), (BlockType.QUOTE, ["quote", "more"])
+        )
+        self.assertEqual(
+            classify_block("* a\n- b"), (BlockType.UNORDERED_LIST, ["a", "b"])
+        )
+        self.assertEqual(
+            classify_block("1. a\n2.  b"), (BlockType.ORDERED_LIST, ["a", "b"])
+        )
+        self.assertEqual(classify_block("1. a\n3. b"), (BlockType.PARAGRAPH, None))
+        self.assertEqual(classify_block("> a\nb"), (BlockType.PARAGRAPH, None))
+        self.assertEqual(classify_block(""), (BlockType.PARAGRAPH, None))
+
+    def test_random_blocks_match_reference(self):
+        generator = random.Random(42)
+        for _ in range(3000):
+            lines = []
+            start = generator.choice(LINE_STARTS)
+            for number in range(1, generator.randint(1, 5) + 1):
+                # Mostly keep the same kind of prefix so lists and quotes occur
+                if generator.random() < 0.2:
+                    start = generator.choice(LINE_STARTS)
+                if start[:1].isdigit() and generator.random() < 0.9:
+                    line_start = f"{number}. "
+                else:
+                    line_start = start
+                lines.append(line_start + generator.choice(LINE_TEXTS))
+            block = "\n".join(lines)
+
+            block_type, stripped_lines = classify_block(block)
+            self.assertEqual(
+                block_type, block_to_block_type_by_passes(block), msg=repr(block)
+            )
+            if block_type in CONVERTERS:
+                converter = CONVERTERS[block_type]
+                self.assertEqual(
+                    converter(block, stripped_lines).to_html(),
+                    converter(block).to_html(),
+                    msg=repr(block),
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import gzip
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import compress
+from compress import precompress_directory, remove_precompressed
+
+
+class TestPrecompress(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.manifest = os.path.join(self.tmp.name, "cache", "precompress.json")
+        os.makedirs(os.path.join(self.docs, "blog"))
+        self.write("index.html", "<p>home</p>" * 100)
+        self.write(os.path.join("blog", "index.html"), "<p>blog</p>" * 100)
+        self.write("index.css", "body { margin: 0 }")
+        self.write("logo.png", "not compressible")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, text):
+        with open(os.path.join(self.docs, rel_path), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def path(self, rel_path):
+        return os.path.join(self.docs, rel_path)
+
+    def precompress(self, jobs=1):
+        return precompress_directory(self.docs, self.manifest, jobs, ["gz"])
+
+    def test_writes_gzip_siblings(self):
+        self.assertEqual(self.precompress(), (3, 0, 0))
+        with gzip.open(self.path("index.html.gz"), "rt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "<p>home</p>" * 100)
+        blog_gz = self.path(os.path.join("blog", "index.html.gz"))
+        self.assertTrue(os.path.exists(blog_gz))
+        self.assertTrue(os.path.exists(self.path("index.css.gz")))
+        self.assertFalse(os.path.exists(self.path("logo.png.gz")))
+
+    def test_output_is_reproducible(self):
+        self.precompress()
+        with open(self.path("index.html.gz"), "rb") as f:
+            first = f.read()
+        os.remove(self.path("index.html.gz"))
+        self.precompress()
+        with open(self.path("index.html.gz"), "rb") as f:
+            self.assertEqual(f.read(), first)
+
+    def test_unchanged_files_are_skipped(self):
+        self.precompress()
+        os.utime(self.path("index.html.gz"), ns=(0, 0))
+        self.write("index.css", "body { margin: 1px }")
+        self.assertEqual(self.precompress(), (1, 2, 0))
+        self.assertEqual(os.stat(self.path("index.html.gz")).st_mtime_ns, 0)
+        with gzip.open(self.path("index.css.gz"), "rt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "body { margin: 1px }")
+
+    def test_unchanged_files_are_not_read(self):
+        self.precompress()
+        with mock.patch.object(compress, "read_chunks") as read_chunks:
+            self.assertEqual(self.precompress(), (0, 3, 0))
+        read_chunks.assert_not_called()
+
+    def test_touched_file_with_same_content_is_not_recompressed(self):
+        self.precompress()
+        os.utime(self.path("index.html.gz"), ns=(0, 0))
+        os.utime(self.path("index.html"), ns=(10**9, 10**9))
+        self.assertEqual(self.precompress(), (0, 3, 0))
+        self.assertEqual(os.stat(self.path("index.html.gz")).st_mtime_ns, 0)
+
+    def test_missing_sibling_is_rewritten(self):
+        self.precompress()
+        os.remove(self.path("index.html.gz"))
+        self.assertEqual(self.precompress(), (1, 2, 0))
+        self.assertTrue(os.path.exists(self.path("index.html.gz")))
+
+    def test_removed_output_drops_sibling(self):
+        self.precompress()
+        os.remove(self.path("index.css"))
+        self.assertEqual(self.precompress(), (0, 2, 1))
+        self.assertFalse(os.path.exists(self.path("index.css.gz")))
+
+    def test_parallel(self):
+        self.assertEqual(self.precompress(jobs=2), (3, 0, 0))
+        self.assertEqual(self.precompress(jobs=2), (0, 3, 0))
+
+    def test_remove_precompressed(self):
+        self.precompress()
+        self.assertEqual(remove_precompressed(self.docs, self.manifest), 3)
+        self.assertFalse(os.path.exists(self.path("index.html.gz")))
+        self.assertFalse(os.path.exists(self.manifest))
+        self.assertTrue(os.path.exists(self.path("index.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
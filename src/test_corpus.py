@@ -0,0 +1,59 @@
+import os
+import sys
+import tempfile
+import unittest
+
+from utils import extract_title, markdown_to_html_node
+
+# The benchmark package lives next to src/
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from bench.corpus import SHAPES, generate_corpus
+
+
+class TestGenerateCorpus(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def corpus(self, name, shape, pages=5, blocks=3, seed=0):
+        root = os.path.join(self.root, name)
+        paths = generate_corpus(root, shape, pages, blocks=blocks, seed=seed)
+        files = {}
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                files[os.path.relpath(path, root)] = f.read()
+        return files
+
+    def test_same_seed_same_corpus(self):
+        first = self.corpus("a", "deep")
+        self.assertEqual(self.corpus("b", "deep"), first)
+        self.assertNotEqual(self.corpus("c", "deep", seed=1), first)
+
+    def test_every_shape_parses_with_a_title(self):
+        for shape in SHAPES:
+            for rel_path, markdown in self.corpus(shape, shape).items():
+                with self.subTest(shape=shape, page=rel_path):
+                    self.assertTrue(extract_title(markdown))
+                    html = markdown_to_html_node(markdown).to_html()
+                    self.assertTrue(html.startswith("<div><h1>"))
+
+    def test_deep_nests_directories(self):
+        def depths(files):
+            return [len(rel_path.split(os.sep)) - 2 for rel_path in files]
+
+        self.assertEqual(set(depths(self.corpus("flat", "paragraph"))), {0})
+        self.assertGreater(max(depths(self.corpus("deep", "deep", pages=20))), 2)
+
+    def test_unknown_shape(self):
+        with self.assertRaisesRegex(ValueError, "Unknown corpus shape"):
+            generate_corpus(self.root, "table", 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import argparse
+import os
+import tempfile
+import unittest
+
+from main import parse_jobs
+from manifest import BuildManifest
+from utils import discover_pages, generate_pages
+
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+
+class TestGeneratePages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        os.makedirs(os.path.join(self.content, "blog", "b"))
+        os.makedirs(os.path.join(self.content, "blog", "a"))
+        self.write(self.template, TEMPLATE)
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "notes.txt"), "not a page")
+        self.write(os.path.join(self.content, "blog", "b", "index.md"), "# B")
+        self.write(os.path.join(self.content, "blog", "a", "index.md"), "# A")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def read_tree(self, root):
+        files = {}
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                with open(path, encoding="utf-8") as f:
+                    files[os.path.relpath(path, root)] = f.read()
+        return files
+
+    def test_discover_pages_sorted(self):
+        docs = os.path.join(self.root, "docs")
+        pages = discover_pages(self.content, docs)
+        self.assertEqual(
+            pages,
+            [
+                (
+                    os.path.join(self.content, "blog", "a", "index.md"),
+                    os.path.join(docs, "blog", "a", "index.html"),
+                ),
+                (
+                    os.path.join(self.content, "blog", "b", "index.md"),
+                    os.path.join(docs, "blog", "b", "index.html"),
+                ),
+                (
+                    os.path.join(self.content, "index.md"),
+                    os.path.join(docs, "index.html"),
+                ),
+            ],
+        )
+
+    def test_parallel_matches_serial(self):
+        serial = os.path.join(self.root, "serial")
+        parallel = os.path.join(self.root, "parallel")
+        generate_pages(discover_pages(self.content, serial), self.template)
+        generate_pages(discover_pages(self.content, parallel), self.template, jobs=2)
+        self.assertEqual(self.read_tree(serial), self.read_tree(parallel))
+        self.assertEqual(len(self.read_tree(parallel)), 3)
+
+    def test_parse_jobs(self):
+        self.assertEqual(parse_jobs("0"), 0)
+        self.assertEqual(parse_jobs("4"), 4)
+        for value in ["-1", "a", ""]:
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_jobs(value)
+
+    def test_errors_reported_per_page(self):
+        self.write(os.path.join(self.content, "blog", "a", "index.md"), "no title")
+        docs = os.path.join(self.root, "docs")
+        with self.assertRaises(Exception) as context:
+            generate_pages(discover_pages(self.content, docs), self.template, jobs=2)
+        self.assertEqual(str(context.exception), "1 of 3 pages failed to generate")
+        # The other pages are still generated
+        self.assertEqual(
+            sorted(self.read_tree(docs)),
+            [os.path.join("blog", "b", "index.html"), "index.html"],
+        )
+
+    def test_directory_layouts(self):
+        self.write(
+            os.path.join(self.content, "blog", "_template.html"),
+            '{% extends "template.html" %}'
+            '{% block body %}{% include "partials/nav.html" %}{{ Content }}'
+            "{% endblock %}",
+        )
+        self.write(
+            self.template,
+            "<title>{{ Title }}</title><body>{% block body %}{{ Content }}"
+            "{% endblock %}</body>",
+        )
+        os.makedirs(os.path.join(self.root, "partials"))
+        nav = os.path.join(self.root, "partials", "nav.html")
+        self.write(nav, "<nav/>")
+        docs = os.path.join(self.root, "docs")
+        pages = discover_pages(self.content, docs)
+        manifest = BuildManifest(os.path.join(self.root, "manifest.json"))
+        generate_pages(
+            pages, self.template, manifest=manifest, content_dir=self.content
+        )
+
+        tree = self.read_tree(docs)
+        self.assertEqual(
+            tree["index.html"],
+            "<title>Home</title><body><div><h1>Home</h1></div></body>",
+        )
+        self.assertEqual(
+            tree[os.path.join("blog", "a", "index.html")],
+            "<title>A</title><body><nav/><div><h1>A</h1></div></body>",
+        )
+
+        # Changing a partial only invalidates the pages whose layout uses it
+        self.write(nav, "<nav>v2</nav>")
+        stats = generate_pages(
+            pages, self.template, manifest=manifest, content_dir=self.content
+        )
+        self.assertEqual(stats["rendered"], 2)
+        self.assertEqual(
+            self.read_tree(docs)[os.path.join("blog", "b", "index.html")],
+            "<title>B</title><body><nav>v2</nav><div><h1>B</h1></div></body>",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
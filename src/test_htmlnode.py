@@ -1,6 +1,7 @@
+import pickle
 import unittest
 
-from htmlnode import HTMLNode
+from htmlnode import HTMLNode, LeafNode, ParentNode
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -20,3 +21,17 @@ class TestHTMLNode(unittest.TestCase):
             "HTMLNode(\"img\", \"This is an image\", {'src': 'image.png', 'alt': 'an image'})",
             f"{node}",
         )
+
+    def test_slots(self):
+        for node in (
+            HTMLNode("p", "text"),
+            LeafNode("b", "bold"),
+            ParentNode("div", [LeafNode(None, "text")]),
+        ):
+            self.assertFalse(hasattr(node, "__dict__"))
+            with self.assertRaises(AttributeError):
+                node.extra = "nope"
+
+    def test_pickle(self):
+        node = ParentNode("p", [LeafNode("a", "link", {"href": "/"})], {"id": "x"})
+        self.assertEqual(pickle.loads(pickle.dumps(node)).to_html(), node.to_html())
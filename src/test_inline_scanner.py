@@ -0,0 +1,110 @@
+import random
+import unittest
+
+from textnode import TextNode, TextType
+from utils import (
+    split_nodes_delimiter,
+    split_nodes_image,
+    split_nodes_link,
+    text_to_textnodes,
+)
+
+
+def text_to_textnodes_by_passes(text):
+    # The original six-pass pipeline, kept as the reference implementation
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+def run(function, text):
+    try:
+        return function(text)
+    except ValueError as e:
+        return e.__class__
+
+
+# Fragments that exercise every delimiter and bracket combination
+PIECES = [
+    "a",
+    "word ",
+    " ",
+    "`code`",
+    "**bold**",
+    "*italic*",
+    "_italic_",
+    "`",
+    "*",
+    "**",
+    "_",
+    "!",
+    "[",
+    "]",
+    "(",
+    ")",
+    "![alt](/img.png)",
+    "[link](/url)",
+    "](",
+    "\n",
+]
+
+
+class TestInlineScannerEquivalence(unittest.TestCase):
+    def assertEquivalent(self, text):
+        self.assertEqual(
+            run(text_to_textnodes, text),
+            run(text_to_textnodes_by_passes, text),
+            msg=repr(text),
+        )
+
+    def test_examples(self):
+        examples = [
+            "",
+            "plain text",
+            "**bold** and *italic* and _italic_ and `code`",
+            "`code with **bold** inside`",
+            "**bold with `code` inside**",
+            "*a `b` c*",
+            "***",
+            "****",
+            "***bold italic***",
+            "**a**b**c**",
+            "![image](/a.png) then [link](/b) and ![x](y)[z](w)",
+            "![a](my_file_name.png)",
+            "[a](b)![c](d)[e](f)",
+            "![[nested]](x)",
+            "[a]((b))",
+            "_italic [link](/x) italic_",
+            "unclosed `code",
+            "unclosed **bold",
+            "unclosed _",
+        ]
+        for text in examples:
+            self.assertEquivalent(text)
+
+    def test_random_inputs(self):
+        generator = random.Random(1234)
+        for _ in range(5000):
+            length = generator.randint(1, 12)
+            text = "".join(generator.choice(PIECES) for _ in range(length))
+            self.assertEquivalent(text)
+
+    def test_unclosed_delimiter_raises(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("a **b")
+
+    def test_many_links(self):
+        text = " ".join(f"[l{i}](/u{i})" for i in range(2000))
+        result = text_to_textnodes(text)
+        self.assertEqual(len(result), 3999)
+        self.assertEqual(result[0], TextNode("l0", TextType.LINK, "/u0"))
+        self.assertEqual(result[-1], TextNode("l1999", TextType.LINK, "/u1999"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -21,3 +21,14 @@ class TestLeafNode(unittest.TestCase):
     def test_leaf_to_html_img(self):
         node = LeafNode("img", "It's a PNG", {"src": "image.png"})
         self.assertEqual(node.to_html(), '<img src="image.png">It\'s a PNG</img>')
+
+    def test_leaf_render_into(self):
+        node = LeafNode("a", "link", {"href": "/x"})
+        chunks = []
+        node.render_into(chunks.append)
+        self.assertEqual(chunks, ['<a href="/x">link</a>'])
+
+    def test_leaf_render_into_no_value(self):
+        node = LeafNode("p", None)
+        with self.assertRaises(ValueError):
+            node.render_into([].append)
@@ -0,0 +1,183 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import manifest as manifest_module
+from manifest import BuildManifest, generator_digest, hash_file
+from utils import generate_pages_recursive
+
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.docs = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.manifest_path = os.path.join(self.root, "cache", "manifest.json")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(self.template, TEMPLATE)
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def build(self, basepath="/"):
+        manifest = BuildManifest(self.manifest_path)
+        generate_pages_recursive(
+            self.content, self.template, self.docs, basepath, manifest=manifest
+        )
+        manifest.save()
+        return manifest
+
+    def mtime(self, *parts):
+        return os.stat(os.path.join(self.docs, *parts)).st_mtime_ns
+
+    def test_first_build_records_every_page(self):
+        manifest = self.build()
+        self.assertEqual(len(manifest.entries), 2)
+        entry = manifest.entries[os.path.join(self.content, "index.md")]
+        self.assertEqual(entry["template"], hash_file(self.template))
+        self.assertEqual(
+            entry["output"], hash_file(os.path.join(self.docs, "index.html"))
+        )
+
+    def test_unchanged_pages_are_skipped(self):
+        self.build()
+        os.utime(os.path.join(self.docs, "blog", "post.html"), ns=(0, 0))
+        self.build()
+        self.assertEqual(self.mtime("blog", "post.html"), 0)
+
+    def test_unchanged_files_are_not_read(self):
+        self.build()
+        with mock.patch.object(manifest_module, "hash_file") as hash_file_mock:
+            manifest = BuildManifest(self.manifest_path)
+            stats = generate_pages_recursive(
+                self.content, self.template, self.docs, "/", manifest=manifest
+            )
+        hash_file_mock.assert_not_called()
+        self.assertEqual(stats["rendered"], 0)
+
+    def test_touched_source_is_hashed_not_rebuilt(self):
+        self.build()
+        os.utime(os.path.join(self.content, "index.md"), ns=(0, 0))
+        manifest = BuildManifest(self.manifest_path)
+        stats = generate_pages_recursive(
+            self.content, self.template, self.docs, "/", manifest=manifest
+        )
+        self.assertEqual(stats["rendered"], 0)
+        entry = manifest.entries[os.path.join(self.content, "index.md")]
+        self.assertEqual(entry["source_stat"][1], 0)
+
+    def test_changed_generator_rebuilds_all(self):
+        self.build()
+        manifest = BuildManifest(self.manifest_path)
+        manifest.generator = "another version"
+        stats = generate_pages_recursive(
+            self.content, self.template, self.docs, "/", manifest=manifest
+        )
+        self.assertEqual(stats["rendered"], 2)
+
+    def test_generator_digest_ignores_tests(self):
+        tmp = os.path.join(self.root, "generator")
+        os.makedirs(tmp)
+        self.write(os.path.join(tmp, "utils.py"), "x = 1")
+        first = generator_digest(tmp)
+        self.write(os.path.join(tmp, "test_utils.py"), "y = 1")
+        generator_digest.cache_clear()
+        self.assertEqual(generator_digest(tmp), first)
+        self.write(os.path.join(tmp, "utils.py"), "x = 2")
+        generator_digest.cache_clear()
+        self.assertNotEqual(generator_digest(tmp), first)
+
+    def test_changed_source_is_rebuilt(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# New home")
+        self.build()
+        with open(os.path.join(self.docs, "index.html"), encoding="utf-8") as f:
+            self.assertIn("New home", f.read())
+
+    def test_changed_template_rebuilds_all(self):
+        self.build()
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.build()
+        post = os.path.join(self.docs, "blog", "post.html")
+        with open(post, encoding="utf-8") as f:
+            self.assertTrue(f.read().startswith("<h1>Post</h1>"))
+
+    def test_changed_basepath_rebuilds(self):
+        self.build()
+        manifest = BuildManifest(self.manifest_path)
+        source = os.path.join(self.content, "index.md")
+        dest = os.path.join(self.docs, "index.html")
+        self.assertTrue(
+            manifest.is_fresh(
+                source, dest, hash_file(source), hash_file(self.template), "/"
+            )
+        )
+        self.assertFalse(
+            manifest.is_fresh(
+                source, dest, hash_file(source), hash_file(self.template), "/site/"
+            )
+        )
+
+    def test_missing_output_is_rebuilt(self):
+        self.build()
+        os.remove(os.path.join(self.docs, "index.html"))
+        self.build()
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+
+    def test_deleted_source_is_dropped(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        manifest = self.build()
+        self.assertEqual(
+            list(manifest.entries), [os.path.join(self.content, "index.md")]
+        )
+
+    def test_remove_stale_outputs(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        manifest = BuildManifest(self.manifest_path)
+        generate_pages_recursive(
+            self.content, self.template, self.docs, "/", manifest=manifest
+        )
+        post = os.path.join(self.docs, "blog", "post.html")
+        self.assertEqual(manifest.remove_stale_outputs(), [post])
+        self.assertFalse(os.path.exists(post))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+
+    def test_removed_outputs_leave_no_empty_directories(self):
+        os.makedirs(os.path.join(self.content, "gone", "deep"))
+        self.write(os.path.join(self.content, "gone", "deep", "index.md"), "# Gone")
+        self.build()
+        os.remove(os.path.join(self.content, "gone", "deep", "index.md"))
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        self.write(os.path.join(self.docs, "blog", "keep.txt"), "not a page")
+        manifest = BuildManifest(self.manifest_path)
+        generate_pages_recursive(
+            self.content, self.template, self.docs, "/", manifest=manifest
+        )
+        manifest.remove_stale_outputs(self.docs)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "gone")))
+        self.assertEqual(os.listdir(os.path.join(self.docs, "blog")), ["keep.txt"])
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+
+    def test_corrupt_manifest_is_ignored(self):
+        os.makedirs(os.path.dirname(self.manifest_path))
+        self.write(self.manifest_path, "{not json")
+        manifest = BuildManifest(self.manifest_path)
+        self.assertEqual(manifest.entries, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
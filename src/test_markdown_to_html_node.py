@@ -1,6 +1,7 @@
 import unittest
 from utils import markdown_to_html_node
 from htmlnode import ParentNode, LeafNode
+from template import UrlRewriter
 
 
 class TestMarkdownToHTMLNode(unittest.TestCase):
@@ -262,6 +263,34 @@ This has a [link](https://example.com) and an ![image](https://example.com/img.p
         self.assertIn("<b>bold</b>", html)
         self.assertIn("<i>italic</i>", html)
 
+    def test_basepath_applied_to_links_and_images(self):
+        """Root-relative URLs get the basepath, other URLs are left alone"""
+        markdown = """[home](/) and [post](/blog/post) and [ext](https://x.org/)
+
+* ![logo](/images/logo.png)
+
+> [quote](/about)"""
+        urls = UrlRewriter("/site/")
+        html = markdown_to_html_node(markdown, urls=urls).to_html()
+        self.assertIn('<a href="/site/">home</a>', html)
+        self.assertIn('<a href="/site/blog/post">post</a>', html)
+        self.assertIn('<a href="https://x.org/">ext</a>', html)
+        self.assertIn('<img src="/site/images/logo.png" alt="logo"></img>', html)
+        self.assertIn('<a href="/site/about">quote</a>', html)
+
+    def test_basepath_leaves_code_samples_alone(self):
+        """Code text that looks like a root-relative attribute is not rewritten"""
+        markdown = """Use `<a href="/x">` in HTML.
+
+```
+<img src="/logo.png">
+```"""
+        urls = UrlRewriter("/site/")
+        html = markdown_to_html_node(markdown, urls=urls).to_html()
+        self.assertIn('<code><a href="/x"></code>', html)
+        self.assertIn('<img src="/logo.png">', html)
+        self.assertNotIn("/site/", html)
+
 
 if __name__ == "__main__":
     unittest.main()
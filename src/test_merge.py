@@ -0,0 +1,181 @@
+import argparse
+import json
+import os
+import tempfile
+import unittest
+
+from compress import (
+    PRECOMPRESS_MANIFEST_PATH,
+    precompress_directory,
+    remove_precompressed,
+)
+from main import parse_shard
+from manifest import MANIFEST_PATH, BuildManifest
+from merge import merge_shards
+from search import SEARCH_CACHE_PATH, SearchIndex
+from utils import (
+    discover_pages,
+    generate_pages,
+    page_shard,
+    select_shard,
+    sync_directory,
+)
+
+
+PAGES = ["index", "blog/tom", "blog/glorfindel", "blog/majesty", "contact"]
+
+
+class TestShards(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for value in ["0/4", "5/4", "2", "a/b", "1/2/3"]:
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_shard(value)
+
+    def test_page_shard_only_depends_on_relative_path(self):
+        self.assertEqual(
+            page_shard(os.path.join("content", "blog", "tom.md"), "content", 4),
+            page_shard(os.path.join("/ci", "src", "blog", "tom.md"), "/ci/src", 4),
+        )
+        # Stable across processes and machines, unlike hash()
+        self.assertEqual(page_shard(os.path.join("content", "a.md"), "content", 7), 5)
+
+    def test_shards_partition_the_pages(self):
+        pages = [
+            (os.path.join("content", f"{i}.md"), os.path.join("docs", f"{i}.html"))
+            for i in range(100)
+        ]
+        shards = [select_shard(pages, "content", (i, 3)) for i in range(1, 4)]
+        self.assertEqual(sorted(sum(shards, [])), sorted(pages))
+        for shard in shards:
+            self.assertGreater(len(shard), 20)
+
+
+class TestMergeShards(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        self.source = os.path.join(self.tmp.name, "source")
+        for name in PAGES:
+            self.write(
+                os.path.join(self.source, "content", name + ".md"),
+                f"# {name}\n\nAbout {name}",
+            )
+        self.write(os.path.join(self.source, "static", "index.css"), "body {}")
+        self.write(os.path.join(self.source, "template.html"), "{{ Content }}")
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def build(self, shard=None, index=False, precompress=False):
+        # Build in the source checkout, then move the results to the shard's
+        # own directory, as a CI runner would upload them
+        shard_dir = os.path.join(self.tmp.name, f"shard{shard[0] if shard else 0}")
+        os.chdir(self.source)
+        manifest = BuildManifest()
+        manifest.static_files = sync_directory("static", "docs", [])[0]
+        pages = discover_pages("content", "docs")
+        if shard is not None:
+            pages = select_shard(pages, "content", shard)
+        search_index = SearchIndex() if index else None
+        generate_pages(pages, "template.html", manifest=manifest, index=search_index)
+        manifest.remove_stale_outputs()
+        manifest.save()
+        if search_index is not None:
+            search_index.write("docs")
+            search_index.save()
+        if precompress:
+            precompress_directory("docs", formats=["gz"])
+        os.makedirs(shard_dir)
+        os.rename("docs", os.path.join(shard_dir, "docs"))
+        os.rename(".build_cache", os.path.join(shard_dir, ".build_cache"))
+        return shard_dir
+
+    def read_manifest(self, root):
+        with open(os.path.join(root, MANIFEST_PATH), encoding="utf-8") as f:
+            manifest = json.load(f)
+        for entry in manifest["pages"].values():
+            del entry["output_stat"]
+        return manifest
+
+    def tree(self, path):
+        files = {}
+        for root, _, names in os.walk(path):
+            for name in names:
+                with open(os.path.join(root, name), encoding="utf-8") as f:
+                    files[os.path.relpath(os.path.join(root, name), path)] = f.read()
+        return files
+
+    def test_merge_matches_unsharded_build(self):
+        full = self.build(index=True)
+        shard_dirs = [self.build((i, 3), index=True) for i in range(1, 4)]
+        os.chdir(self.source)
+        stats = merge_shards(shard_dirs)
+        self.assertEqual(stats["pages"], len(PAGES))
+        self.assertEqual(self.tree("docs"), self.tree(os.path.join(full, "docs")))
+
+        # Outputs were written at different times, the rest must match
+        merged_manifest = self.read_manifest(".")
+        self.assertEqual(merged_manifest, self.read_manifest(full))
+        for entry in BuildManifest().entries.values():
+            self.assertEqual(
+                entry["output_stat"][1], os.stat(entry["dest"]).st_mtime_ns
+            )
+        self.assertEqual(
+            SearchIndex(SEARCH_CACHE_PATH).pages,
+            SearchIndex(os.path.join(full, SEARCH_CACHE_PATH)).pages,
+        )
+
+    def test_merge_removes_files_no_shard_wrote(self):
+        shard_dirs = [self.build((i, 2)) for i in range(1, 3)]
+        os.chdir(self.source)
+        self.write(os.path.join("docs", "old.html"), "stale")
+        self.assertEqual(merge_shards(shard_dirs)["deleted"], 1)
+        self.assertFalse(os.path.exists(os.path.join("docs", "old.html")))
+        # Merging again finds everything in place
+        stats = merge_shards(shard_dirs)
+        self.assertEqual((stats["copied"], stats["deleted"]), (0, 0))
+
+    def test_merge_keeps_precompressed_records(self):
+        shard_dirs = [self.build((i, 2), precompress=True) for i in range(1, 3)]
+        os.chdir(self.source)
+        merge_shards(shard_dirs)
+        with open(PRECOMPRESS_MANIFEST_PATH, encoding="utf-8") as f:
+            files = json.load(f)["files"]
+        self.assertEqual(len(files), len(PAGES) + 1)
+        self.assertTrue(os.path.isfile(os.path.join("docs", "index.css.gz")))
+
+        # A build without --precompress can then remove every copy
+        self.assertEqual(remove_precompressed("docs"), len(PAGES) + 1)
+        for _, _, names in os.walk("docs"):
+            self.assertFalse([name for name in names if name.endswith(".gz")])
+
+    def test_precompress_records_of_a_previous_build_are_dropped(self):
+        shard_dirs = [self.build((i, 2)) for i in range(1, 3)]
+        os.chdir(self.source)
+        self.write(PRECOMPRESS_MANIFEST_PATH, "{}")
+        merge_shards(shard_dirs)
+        self.assertFalse(os.path.exists(PRECOMPRESS_MANIFEST_PATH))
+
+    def test_colliding_outputs_are_rejected(self):
+        shard_dirs = [self.build((i, 2)) for i in range(1, 3)]
+        self.write(os.path.join(shard_dirs[1], "docs", "index.css"), "body { x }")
+        os.chdir(self.source)
+        with self.assertRaisesRegex(ValueError, "disagree on index.css"):
+            merge_shards(shard_dirs)
+        self.assertFalse(os.path.exists("docs"))
+
+    def test_page_built_twice_is_rejected(self):
+        first = self.build((1, 2))
+        os.rename(first, os.path.join(self.tmp.name, "first"))
+        second = self.build((1, 2))
+        os.chdir(self.source)
+        with self.assertRaisesRegex(ValueError, "was built by both"):
+            merge_shards([os.path.join(self.tmp.name, "first"), second])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from minify import HtmlMinifier, minify_html
+from template import CompiledTemplate
+
+
+HTML = """<div>
+  <p>Some   text,
+     wrapped</p>
+  <pre><code>def f():
+    return  1
+</code></pre>
+  <p>a  b</p>
+</div>"""
+
+
+def minify_chunks(chunks):
+    output = []
+    minifier = HtmlMinifier(output.append)
+    for chunk in chunks:
+        minifier.write(chunk)
+    minifier.flush()
+    return "".join(output)
+
+
+class TestHtmlMinifier(unittest.TestCase):
+    def test_collapses_whitespace_outside_pre(self):
+        self.assertEqual(
+            minify_chunks([HTML]),
+            "<div> <p>Some text, wrapped</p> <pre><code>def f():\n    return  1\n"
+            "</code></pre> <p>a  b</p> </div>",
+        )
+
+    def test_any_chunking_gives_the_same_output(self):
+        expected = minify_chunks([HTML])
+        for size in range(1, 12):
+            chunks = [HTML[i : i + size] for i in range(0, len(HTML), size)]
+            self.assertEqual(minify_chunks(chunks), expected, size)
+
+    def test_raw_elements(self):
+        html = "<script>if (a  <  b) {\n}</script>  <textarea> x  y </textarea>"
+        self.assertEqual(
+            minify_chunks([html]),
+            "<script>if (a  <  b) {\n}</script> <textarea> x  y </textarea>",
+        )
+
+    def test_uppercase_raw_elements(self):
+        html = "<PRE>a  b</PRE>\n\n<p>x    y</p><Script>c  d</SCRIPT>  <p>e  f</p>"
+        expected = "<PRE>a  b</PRE> <p>x y</p><Script>c  d</SCRIPT> <p>e f</p>"
+        self.assertEqual(minify_chunks([html]), expected)
+        for size in range(1, 8):
+            chunks = [html[i : i + size] for i in range(0, len(html), size)]
+            self.assertEqual(minify_chunks(chunks), expected, size)
+
+    def test_minify_html_strips_comments(self):
+        self.assertEqual(
+            minify_html("<p>\n  <!-- a\n comment -->\n  x</p>"), "<p> x</p>"
+        )
+
+
+class TestMinifiedTemplate(unittest.TestCase):
+    def test_render_minifies_slot_values(self):
+        template = CompiledTemplate(
+            "<html>\n  <!-- header -->\n  <title>{{ Title }}</title>\n"
+            "  <body>{{ Content }}</body>\n</html>\n",
+            minify=True,
+        )
+        node = ParentNode(
+            "div",
+            [
+                LeafNode("p", "two  words\n"),
+                ParentNode("pre", [LeafNode("code", "keep  this\n")]),
+            ],
+        )
+        self.assertEqual(
+            template.render(Title="A  title", Content=node),
+            "<html> <title>A title</title> <body><div><p>two words </p>"
+            "<pre><code>keep  this\n</code></pre></div></body> </html> ",
+        )
+
+    def test_slot_inside_template_pre_is_kept(self):
+        template = CompiledTemplate("<pre>{{ Content }}</pre>", minify=True)
+        self.assertEqual(template.render(Content="a  b"), "<pre>a  b</pre>")
+
+    def test_minify_changes_source_hash(self):
+        self.assertNotEqual(
+            CompiledTemplate("<p>{{ Content }}</p>").source_hash,
+            CompiledTemplate("<p>{{ Content }}</p>", minify=True).source_hash,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import hashlib
+import os
+import tempfile
+import unittest
+
+from outputwriter import OutputWriter
+
+
+class TestOutputWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "page.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, chunks):
+        writer = OutputWriter(self.path)
+        for chunk in chunks:
+            writer.write(chunk)
+        return writer, writer.close()
+
+    def read(self):
+        with open(self.path, encoding="utf-8") as f:
+            return f.read()
+
+    def set_old_mtime(self):
+        os.utime(self.path, ns=(0, 0))
+
+    def test_new_file_is_written(self):
+        writer, written = self.write(["<p>", "hello", "</p>"])
+        self.assertTrue(written)
+        self.assertEqual(self.read(), "<p>hello</p>")
+        expected = hashlib.sha256(b"<p>hello</p>").hexdigest()
+        self.assertEqual(writer.hexdigest(), expected)
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+
+    def test_identical_file_is_untouched(self):
+        self.write(["<p>", "hello", "</p>"])
+        self.set_old_mtime()
+        # Chunk boundaries do not matter, only the bytes
+        _, written = self.write(["<p>hel", "lo</p>"])
+        self.assertFalse(written)
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+
+    def test_changed_file_is_rewritten(self):
+        self.write(["<p>hello</p>"])
+        self.set_old_mtime()
+        _, written = self.write(["<p>", "hello", " world</p>"])
+        self.assertTrue(written)
+        self.assertEqual(self.read(), "<p>hello world</p>")
+        self.assertNotEqual(os.stat(self.path).st_mtime_ns, 0)
+
+    def test_shorter_output_is_rewritten(self):
+        self.write(["<p>hello</p>"])
+        _, written = self.write(["<p>hello"])
+        self.assertTrue(written)
+        self.assertEqual(self.read(), "<p>hello")
+
+    def test_unicode_output(self):
+        self.write(["<p>café</p>"])
+        writer, written = self.write(["<p>caf", "é</p>"])
+        self.assertFalse(written)
+        self.assertEqual(writer.size, len("<p>café</p>".encode("utf-8")))
+
+    def test_abort_keeps_existing_file(self):
+        self.write(["<p>hello</p>"])
+        writer = OutputWriter(self.path)
+        writer.write("<div>")
+        writer.abort()
+        self.assertEqual(self.read(), "<p>hello</p>")
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+
+
+if __name__ == "__main__":
+    unittest.main()
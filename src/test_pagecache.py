@@ -0,0 +1,147 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import utils
+from pagecache import PageCache, page_cache_key
+from search import SearchIndex
+from template import UrlRewriter
+from utils import generate_pages_recursive
+
+
+class TestPageCacheKey(unittest.TestCase):
+    def test_key_depends_on_everything_rendered(self):
+        key = page_cache_key(1, "# Title", "/")
+        self.assertEqual(key, page_cache_key(1, "# Title", "/"))
+        self.assertNotEqual(key, page_cache_key(2, "# Title", "/"))
+        self.assertNotEqual(key, page_cache_key(1, "# Title!", "/"))
+        self.assertNotEqual(key, page_cache_key(1, "# Title", "/site/"))
+        assets = UrlRewriter("/", {"logo.png": "logo.0123456789.png"})
+        self.assertNotEqual(key, page_cache_key(1, "# Title", assets.key))
+
+
+class TestPageCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp.name, "pages")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_put_get(self):
+        cache = PageCache(self.cache_dir)
+        self.assertIsNone(cache.get("ab12"))
+        cache.put("ab12", {"title": "T", "body": "<div></div>"})
+        self.assertEqual(cache.get("ab12"), {"title": "T", "body": "<div></div>"})
+
+    def test_corrupt_entry_is_a_miss(self):
+        cache = PageCache(self.cache_dir)
+        cache.put("ab12", {"title": "T"})
+        with open(cache.entry_path("ab12"), "wb") as f:
+            f.write(b"not zlib")
+        self.assertIsNone(cache.get("ab12"))
+
+    def test_prune_removes_least_recently_used(self):
+        cache = PageCache(self.cache_dir)
+        for i, key in enumerate(["aa01", "bb02", "cc03"]):
+            cache.put(key, {"body": "x" * 100})
+            os.utime(cache.entry_path(key), ns=(i, i))
+        # Reading an entry makes it the most recently used
+        cache.get("aa01")
+        cache.max_bytes = os.path.getsize(cache.entry_path("aa01")) * 2
+        self.assertEqual(cache.prune(), (2, 1))
+        self.assertIsNone(cache.get("bb02"))
+        self.assertIsNotNone(cache.get("aa01"))
+        self.assertIsNotNone(cache.get("cc03"))
+
+
+class TestGenerateWithPageCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.cache = PageCache(os.path.join(self.tmp.name, "pages"))
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(
+            os.path.join(self.content, "index.md"),
+            "# Home\n\n## Welcome\n\nA [link](/blog) and **bold** words",
+        )
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog\n\nPosts")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def read(self, rel_path):
+        with open(os.path.join(self.docs, rel_path), encoding="utf-8") as f:
+            return f.read()
+
+    def build(self, basepath="/", jobs=1, index=None):
+        return generate_pages_recursive(
+            self.content,
+            self.template,
+            self.docs,
+            basepath,
+            jobs=jobs,
+            index=index,
+            page_cache=self.cache,
+        )
+
+    def test_cached_pages_are_not_parsed(self):
+        self.build()
+        first = self.read("index.html")
+        shutil.rmtree(self.docs)
+        with mock.patch.object(utils, "parse_document") as parse_document:
+            self.build()
+        parse_document.assert_not_called()
+        self.assertEqual(self.read("index.html"), first)
+        self.assertIn('<a href="/blog">link</a>', first)
+
+    def test_parallel_workers_share_the_cache(self):
+        self.build(jobs=2)
+        first = self.read(os.path.join("blog", "index.html"))
+        shutil.rmtree(self.docs)
+        with mock.patch.object(utils, "parse_document") as parse_document:
+            self.build()
+        parse_document.assert_not_called()
+        self.assertEqual(self.read(os.path.join("blog", "index.html")), first)
+
+    def test_generator_change_misses(self):
+        self.build()
+        with mock.patch.object(utils, "generator_digest", return_value="other"):
+            with mock.patch.object(
+                utils, "parse_document", wraps=utils.parse_document
+            ) as parse_document:
+                self.build()
+        self.assertEqual(parse_document.call_count, 2)
+
+    def test_basepath_change_misses(self):
+        self.build()
+        self.build("/site/")
+        self.assertIn('<a href="/site/blog">link</a>', self.read("index.html"))
+
+    def test_index_terms_come_from_the_cache(self):
+        self.build()
+        # Entries written without terms cannot feed a search index
+        index = SearchIndex(None)
+        self.build(index=index)
+        terms = index.pages[os.path.join(self.docs, "index.html")]["terms"]
+        self.assertEqual(terms["bold"], 1)
+
+        shutil.rmtree(self.docs)
+        cached_index = SearchIndex(None)
+        with mock.patch.object(utils, "parse_document") as parse_document:
+            self.build(index=cached_index)
+        parse_document.assert_not_called()
+        self.assertEqual(cached_index.pages, index.pages)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -51,3 +51,21 @@ class TestParentNode(unittest.TestCase):
             parent_node.to_html(),
             '<div class="container" id="main"><span>child</span></div>',
         )
+
+    # Test that render_into streams the same HTML as to_html in chunks
+    def test_render_into_chunks(self):
+        parent_node = ParentNode(
+            "ul", [ParentNode("li", [LeafNode(None, "a"), LeafNode("b", "b")])]
+        )
+        chunks = []
+        parent_node.render_into(chunks.append)
+        self.assertEqual(chunks, ["<ul>", "<li>", "a", "<b>b</b>", "</li>", "</ul>"])
+        self.assertEqual("".join(chunks), parent_node.to_html())
+
+    # Test rendering a very wide tree
+    def test_render_into_wide_tree(self):
+        children = [LeafNode("li", str(i)) for i in range(10000)]
+        parent_node = ParentNode("ol", children)
+        html = parent_node.to_html()
+        self.assertTrue(html.startswith("<ol><li>0</li><li>1</li>"))
+        self.assertTrue(html.endswith("<li>9999</li></ol>"))
@@ -0,0 +1,74 @@
+import unittest
+
+from blockcache import BlockCache
+from template import UrlRewriter
+from utils import extract_title, markdown_to_html_node, parse_document
+
+
+DOCUMENT = """## Before the title
+
+# The **Title**
+
+Intro paragraph with a [link](/about).
+
+## Section one
+
+```
+# not a heading
+```
+
+### Detail
+
+# Second h1"""
+
+
+class TestParseDocument(unittest.TestCase):
+    def test_title_matches_extract_title(self):
+        document = parse_document(DOCUMENT)
+        self.assertEqual(document.title, extract_title(DOCUMENT))
+        self.assertEqual(document.title, "The **Title**")
+
+    def test_node_matches_markdown_to_html_node(self):
+        urls = UrlRewriter("/site/")
+        document = parse_document(DOCUMENT, urls=urls)
+        self.assertEqual(
+            document.node.to_html(),
+            markdown_to_html_node(DOCUMENT, urls=urls).to_html(),
+        )
+
+    def test_heading_outline(self):
+        document = parse_document(DOCUMENT)
+        self.assertEqual(
+            document.headings,
+            [
+                (2, "Before the title"),
+                (1, "The **Title**"),
+                (2, "Section one"),
+                (3, "Detail"),
+                (1, "Second h1"),
+            ],
+        )
+        self.assertEqual(document.block_count, 7)
+
+    def test_no_title(self):
+        document = parse_document("## Only h2\n\ntext")
+        self.assertIsNone(document.title)
+        self.assertEqual(document.headings, [(2, "Only h2")])
+
+    def test_empty_document(self):
+        document = parse_document("")
+        self.assertIsNone(document.title)
+        self.assertEqual(document.headings, [])
+        self.assertEqual(document.node.to_html(), "<div></div>")
+
+    def test_outline_collected_for_cached_blocks(self):
+        cache = BlockCache()
+        parse_document(DOCUMENT, cache)
+        document = parse_document(DOCUMENT, cache)
+        self.assertEqual(cache.hits, 7)
+        self.assertEqual(document.title, "The **Title**")
+        self.assertEqual(len(document.headings), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import json
+import os
+import tempfile
+import unittest
+
+from profiler import BuildProfile, write_report
+from utils import discover_pages, generate_pages
+
+
+class TestBuildProfile(unittest.TestCase):
+    def test_stage_counts_calls(self):
+        profile = BuildProfile()
+        with profile.stage("parse"):
+            pass
+        with profile.stage("parse"):
+            pass
+        self.assertEqual(profile.stages["parse"]["calls"], 2)
+        self.assertGreaterEqual(profile.stages["parse"]["seconds"], 0)
+
+    def test_merge(self):
+        profile = BuildProfile()
+        profile.add_time("read", 1.0)
+        profile.bytes_read = 10
+        worker = BuildProfile()
+        worker.add_time("read", 2.0)
+        worker.add_page("a.md", 0.5)
+        worker.bytes_read = 5
+        worker.bytes_written = 7
+        profile.merge(worker.to_dict())
+        self.assertEqual(profile.stages["read"], {"seconds": 3.0, "calls": 2})
+        self.assertEqual(profile.pages, {"a.md": 0.5})
+        self.assertEqual((profile.bytes_read, profile.bytes_written), (15, 7))
+
+    def test_report_lists_slowest_pages(self):
+        profile = BuildProfile()
+        for i, seconds in enumerate([0.3, 0.1, 0.5, 0.2]):
+            profile.add_page(f"page{i}.md", seconds)
+        report = profile.report(top=2)
+        self.assertEqual(report["page_count"], 4)
+        self.assertEqual(
+            report["slowest_pages"],
+            [
+                {"path": "page2.md", "seconds": 0.5},
+                {"path": "page0.md", "seconds": 0.3},
+            ],
+        )
+
+    def test_write_report(self):
+        profile = BuildProfile()
+        profile.add_page("page.md", 0.25)
+        with profile.stage("read"):
+            pass
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = os.path.join(tmp, "out", "profile.json")
+            text_path = os.path.join(tmp, "out", "profile.txt")
+            text = write_report(profile.report(), json_path, text_path)
+            with open(json_path, encoding="utf-8") as f:
+                self.assertEqual(json.load(f)["pages"], {"page.md": 0.25})
+            with open(text_path, encoding="utf-8") as f:
+                self.assertEqual(f.read(), text)
+        self.assertIn("250.0 ms  page.md", text)
+
+    def test_generate_pages_profile(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            template = os.path.join(tmp, "template.html")
+            os.makedirs(content)
+            for name in ("a", "b"):
+                with open(os.path.join(content, f"{name}.md"), "w") as f:
+                    f.write(f"# {name}\n\nSome *text*.")
+            with open(template, "w") as f:
+                f.write("{{ Title }}{{ Content }}")
+
+            for jobs in (1, 2):
+                profile = BuildProfile()
+                docs = os.path.join(tmp, f"docs{jobs}")
+                pages = discover_pages(content, docs)
+                generate_pages(pages, template, jobs=jobs, profile=profile)
+                self.assertEqual(
+                    sorted(profile.pages),
+                    [os.path.join(content, "a.md"), os.path.join(content, "b.md")],
+                )
+                self.assertEqual(profile.stages["parse_document"]["calls"], 2)
+                # Two 17-byte pages and the 24-byte template
+                self.assertEqual(profile.bytes_read, 58)
+                self.assertGreater(profile.bytes_written, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from blockcache import BlockCache
+from manifest import BuildManifest
+from search import (
+    SearchIndex,
+    add_text_terms,
+    page_url,
+    remove_search_index,
+    shard_name,
+)
+from utils import generate_pages_recursive, parse_document, stream_document
+
+
+class TestTerms(unittest.TestCase):
+    def test_add_text_terms(self):
+        terms = {}
+        add_text_terms(terms, "The Ring, the RING! A ring-bearer's tale.")
+        self.assertEqual(terms, {"the": 2, "ring": 3, "bearer": 1, "tale": 1})
+
+    def test_shard_name(self):
+        self.assertEqual(shard_name("ring"), "ri")
+        self.assertEqual(shard_name("x"), "x")
+        self.assertEqual(shard_name("éowyn"), "_c3a96f")
+        self.assertEqual(shard_name("a_b"), "_615f")
+
+    def test_page_url(self):
+        self.assertEqual(page_url(os.path.join("docs", "index.html"), "docs"), "")
+        self.assertEqual(
+            page_url(os.path.join("docs", "blog", "tom", "index.html"), "docs"),
+            "blog/tom/",
+        )
+        self.assertEqual(page_url(os.path.join("docs", "a.html"), "docs"), "a.html")
+
+    def test_document_terms_include_cached_blocks(self):
+        markdown = "# Title\n\nSome **bold** text with `code`\n\n* a list item"
+        cache = BlockCache()
+        first = parse_document(markdown, cache, collect_terms=True)
+        second = parse_document(markdown, cache, collect_terms=True)
+        self.assertEqual(cache.hits, 3)
+        self.assertEqual(first.terms, second.terms)
+        self.assertEqual(
+            first.terms,
+            {
+                "title": 1,
+                "some": 1,
+                "bold": 1,
+                "text": 1,
+                "with": 1,
+                "code": 1,
+                "list": 1,
+                "item": 1,
+            },
+        )
+        self.assertIsNone(parse_document(markdown).terms)
+
+    def test_streamed_document_terms(self):
+        markdown = "# Title\n\nfirst words\n\nlast words\n"
+        document = stream_document(io.StringIO(markdown), collect_terms=True)
+        document.node.to_html()
+        self.assertEqual(
+            document.terms, parse_document(markdown, collect_terms=True).terms
+        )
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.cache_path = os.path.join(self.tmp.name, "search.json")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome home")
+        self.write(
+            os.path.join(self.content, "blog", "index.md"), "# Blog\n\nRings and more"
+        )
+        self.write(self.template, "{{ Title }}{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def read_json(self, name):
+        with open(os.path.join(self.docs, "search-index", name), encoding="utf-8") as f:
+            return json.load(f)
+
+    def build(self, manifest=None, jobs=1):
+        index = SearchIndex(self.cache_path)
+        generate_pages_recursive(
+            self.content,
+            self.template,
+            self.docs,
+            manifest=manifest,
+            jobs=jobs,
+            index=index,
+        )
+        index.write(self.docs)
+        index.save()
+        return index
+
+    def test_write_shards(self):
+        self.build()
+        self.assertEqual(
+            self.read_json("pages.json"),
+            {"prefix_length": 2, "pages": [["blog/", "Blog"], ["", "Home"]]},
+        )
+        self.assertEqual(self.read_json("ho.json"), {"home": [[1, 2]]})
+        self.assertEqual(self.read_json("ri.json"), {"rings": [[0, 1]]})
+
+    def test_parallel_build_gives_same_index(self):
+        self.build(jobs=2)
+        parallel = self.read_json("ho.json")
+        self.build(jobs=1)
+        self.assertEqual(self.read_json("ho.json"), parallel)
+
+    def test_skipped_pages_keep_their_terms(self):
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        self.build(manifest)
+        manifest.save()
+
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nGoodbye")
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        self.build(manifest)
+        self.assertEqual(self.read_json("ri.json"), {"rings": [[0, 1]]})
+        self.assertEqual(self.read_json("go.json"), {"goodbye": [[1, 1]]})
+        # The shard of the removed word is gone
+        self.assertFalse(
+            os.path.exists(os.path.join(self.docs, "search-index", "we.json"))
+        )
+
+    def test_missing_index_entry_rebuilds_page(self):
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        self.build(manifest)
+        manifest.save()
+        os.remove(self.cache_path)
+
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        index = self.build(manifest)
+        self.assertEqual(len(index.pages), 2)
+
+    def test_removed_page_dropped(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "index.md"))
+        self.build()
+        self.assertEqual(self.read_json("pages.json")["pages"], [["", "Home"]])
+
+    def test_remove_search_index_with_compressed_copies(self):
+        self.build()
+        search_dir = os.path.join(self.docs, "search-index")
+        with open(os.path.join(search_dir, "pages.json.gz"), "wb") as f:
+            f.write(b"gz")
+        remove_search_index(self.docs, self.cache_path)
+        self.assertFalse(os.path.exists(search_dir))
+        self.assertFalse(os.path.exists(self.cache_path))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
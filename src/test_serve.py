@@ -0,0 +1,193 @@
+import functools
+import http.client
+import os
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer
+
+from main import build, parse_args
+from manifest import BuildManifest
+from search import SEARCH_CACHE_PATH, SearchIndex
+from serve import (
+    RELOAD_PATH,
+    RELOAD_SCRIPT,
+    LiveReload,
+    LiveReloadHandler,
+    Watcher,
+    is_template_source,
+)
+
+
+class TestWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.tmp.name)
+        self.write(os.path.join("content", "index.md"), "# Home\n\nWelcome")
+        self.write(os.path.join("content", "blog", "post.md"), "# Post\n\nText")
+        self.write(os.path.join("static", "index.css"), "body {}")
+        self.write(os.path.join("layouts", "foot.html"), "<footer>1</footer>")
+        self.write(
+            "template.html", '{{ Title }}{{ Content }}{% include "layouts/foot.html" %}'
+        )
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def read(self, rel_path):
+        with open(os.path.join("docs", rel_path), encoding="utf-8") as f:
+            return f.read()
+
+    def watch(self, *argv):
+        args = parse_args(list(argv))
+        _, templates = build(args)
+        return Watcher(args, templates)
+
+    def test_nothing_changed(self):
+        watcher = self.watch()
+        self.assertFalse(watcher.poll())
+
+    def test_edited_page_is_regenerated(self):
+        watcher = self.watch()
+        post_stat = os.stat(os.path.join("docs", "blog", "post.html"))
+        self.write(os.path.join("content", "index.md"), "# Home\n\nWelcome back")
+        self.assertTrue(watcher.poll())
+        self.assertIn("Welcome back", self.read("index.html"))
+        # The manifest skips the page that did not change
+        self.assertEqual(
+            os.stat(os.path.join("docs", "blog", "post.html")).st_mtime_ns,
+            post_stat.st_mtime_ns,
+        )
+
+    def test_deleted_page_output_is_removed(self):
+        watcher = self.watch()
+        os.remove(os.path.join("content", "blog", "post.md"))
+        self.assertTrue(watcher.poll())
+        self.assertFalse(os.path.exists(os.path.join("docs", "blog", "post.html")))
+        self.assertEqual(
+            list(BuildManifest().entries), [os.path.join("content", "index.md")]
+        )
+
+    def test_template_edit_regenerates_every_page(self):
+        watcher = self.watch()
+        # Included from outside partials/
+        self.write(os.path.join("layouts", "foot.html"), "<footer>2</footer>")
+        self.assertTrue(watcher.poll())
+        for rel_path in ["index.html", os.path.join("blog", "post.html")]:
+            self.assertIn("<footer>2</footer>", self.read(rel_path))
+
+        self.write(os.path.join("layouts", "side.html"), "<aside/>")
+        self.write("template.html", '{% include "layouts/side.html" %}{{ Content }}')
+        self.assertTrue(watcher.poll())
+        self.assertTrue(self.read("index.html").startswith("<aside/>"))
+        # The newly included template is watched from now on
+        self.assertFalse(watcher.poll())
+        self.write(os.path.join("layouts", "side.html"), "<aside>new</aside>")
+        self.assertTrue(watcher.poll())
+        self.assertIn("<aside>new</aside>", self.read("index.html"))
+
+    def test_static_change_keeps_the_pages(self):
+        watcher = self.watch()
+        self.write(os.path.join("static", "index.css"), "body { margin: 0 }")
+        self.assertTrue(watcher.poll())
+        self.assertEqual(self.read("index.css"), "body { margin: 0 }")
+        self.assertEqual(len(BuildManifest().entries), 2)
+
+    def test_rebuilds_use_the_build_options(self):
+        watcher = self.watch("--search-index", "--block-cache", "8")
+        self.write(os.path.join("content", "index.md"), "# Home\n\nA zebra")
+        self.assertTrue(watcher.poll())
+        pages = SearchIndex(SEARCH_CACHE_PATH).pages
+        self.assertEqual(len(pages), 2)
+        self.assertIn("zebra", pages[os.path.join("docs", "index.html")]["terms"])
+        self.assertGreater(watcher.cache.stats()["misses"], 0)
+
+    def test_is_template_source(self):
+        footer = os.path.join("layouts", "foot.html")
+        templates = {"template.html", footer}
+        self.assertTrue(is_template_source(footer, templates))
+        layout = os.path.join("content", "blog", "_template.html")
+        self.assertTrue(is_template_source(layout, templates))
+        page = os.path.join("content", "index.md")
+        self.assertFalse(is_template_source(page, templates))
+        unused = os.path.join("partials", "unused.html")
+        self.assertFalse(is_template_source(unused, templates))
+
+
+class TestLiveReload(unittest.TestCase):
+    def test_wait_returns_the_new_generation(self):
+        live_reload = LiveReload()
+        self.assertEqual(live_reload.wait(0, timeout=0), 0)
+        threading.Timer(0.01, live_reload.notify).start()
+        self.assertEqual(live_reload.wait(0, timeout=5), 1)
+
+
+class QuietHandler(LiveReloadHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class TestLiveReloadHandler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.write("index.html", "<html><body><p>Hi</p></body></html>")
+        self.write("page.html", "<p>No body</p>")
+        self.write("index.css", "body {}")
+
+        handler = functools.partial(QuietHandler, directory=self.tmp.name)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        self.server.live_reload = LiveReload()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def write(self, name, text):
+        with open(os.path.join(self.tmp.name, name), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def connect(self):
+        connection = http.client.HTTPConnection(*self.server.server_address)
+        self.addCleanup(connection.close)
+        return connection
+
+    def get(self, path):
+        connection = self.connect()
+        connection.request("GET", path)
+        response = connection.getresponse()
+        return response, response.read().decode("utf-8")
+
+    def test_script_is_injected_before_body_end(self):
+        for path in ["/index.html", "/"]:
+            response, html = self.get(path)
+            self.assertEqual(response.status, 200)
+            self.assertEqual(
+                html, f"<html><body><p>Hi</p>{RELOAD_SCRIPT}</body></html>"
+            )
+            self.assertEqual(response.getheader("Cache-Control"), "no-store")
+
+    def test_script_is_appended_without_body(self):
+        _, html = self.get("/page.html")
+        self.assertEqual(html, "<p>No body</p>" + RELOAD_SCRIPT)
+
+    def test_other_files_are_served_unchanged(self):
+        response, css = self.get("/index.css")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(css, "body {}")
+
+    def test_reload_event_after_notify(self):
+        connection = self.connect()
+        connection.request("GET", RELOAD_PATH)
+        response = connection.getresponse()
+        self.assertEqual(response.getheader("Content-Type"), "text/event-stream")
+        self.server.live_reload.notify()
+        self.assertEqual(response.readline(), b"data: reload\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
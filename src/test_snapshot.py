@@ -0,0 +1,198 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from snapshot import (
+    diff_snapshots,
+    digest_stats,
+    load_snapshot,
+    save_snapshot,
+    snapshot_tree,
+    stat_paths,
+)
+
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestSnapshotTree(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        os.makedirs(os.path.join(self.root, "blog"))
+        self.write(os.path.join(self.root, "index.md"), "# Home")
+        self.write(os.path.join(self.root, "blog", "post.md"), "# Post")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_snapshot_tree(self):
+        snapshot = snapshot_tree(self.root)
+        self.assertEqual(
+            sorted(snapshot),
+            [
+                os.path.join(self.root, "blog", "post.md"),
+                os.path.join(self.root, "index.md"),
+            ],
+        )
+        self.assertEqual(snapshot[os.path.join(self.root, "index.md")][0], 6)
+
+    def test_snapshot_single_file_and_missing_path(self):
+        path = os.path.join(self.root, "index.md")
+        self.assertEqual(list(snapshot_tree(path)), [path])
+        self.assertEqual(snapshot_tree(os.path.join(self.root, "missing")), {})
+
+    def test_diff_snapshots(self):
+        old = snapshot_tree(self.root)
+        self.write(os.path.join(self.root, "index.md"), "# New home")
+        self.write(os.path.join(self.root, "blog", "new.md"), "# New")
+        os.remove(os.path.join(self.root, "blog", "post.md"))
+        changed, removed = diff_snapshots(old, snapshot_tree(self.root))
+        self.assertEqual(
+            changed,
+            [
+                os.path.join(self.root, "blog", "new.md"),
+                os.path.join(self.root, "index.md"),
+            ],
+        )
+        self.assertEqual(removed, [os.path.join(self.root, "blog", "post.md")])
+
+    def test_diff_unchanged(self):
+        snapshot = snapshot_tree(self.root)
+        self.assertEqual(diff_snapshots(snapshot, dict(snapshot)), ([], []))
+
+
+class TestSavedSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        os.makedirs(os.path.join(self.root, "sub"))
+        self.write("a.md", "a")
+        self.write(os.path.join("sub", "b.md"), "b")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, text):
+        with open(os.path.join(self.root, rel_path), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_directories_and_suffix(self):
+        sub = os.path.join(self.root, "sub")
+        snapshot = snapshot_tree(self.root, directories=True, files=False)
+        self.assertEqual(sorted(snapshot), [self.root, sub])
+        self.assertEqual(snapshot_tree(self.root, suffix=".py"), {})
+        self.write("c.py", "c")
+        self.assertEqual(
+            list(snapshot_tree(self.root, suffix=".py")),
+            [os.path.join(self.root, "c.py")],
+        )
+
+    def test_directory_mtime_shows_added_files(self):
+        sub = os.path.join(self.root, "sub")
+        os.utime(sub, ns=(0, 0))
+        before = stat_paths([sub])
+        self.write(os.path.join("sub", "c.md"), "c")
+        self.assertNotEqual(stat_paths([sub]), before)
+
+    def test_stat_paths_of_a_missing_path(self):
+        self.assertIsNone(stat_paths([self.root, os.path.join(self.root, "x")]))
+
+    def test_save_and_load(self):
+        path = os.path.join(self.root, "cache", "snapshot.json")
+        self.assertEqual(load_snapshot(path), (None, None, []))
+        # Writing the snapshot changes the root's mtime, not sub's
+        stats = snapshot_tree(os.path.join(self.root, "sub"), directories=True)
+        save_snapshot(path, {"basepath": "/"}, stats)
+        settings, digest, paths = load_snapshot(path)
+        self.assertEqual(settings, {"basepath": "/"})
+        self.assertEqual(paths, sorted(stats))
+        self.assertEqual(digest_stats(stat_paths(paths)), digest)
+        os.utime(os.path.join(self.root, "sub", "b.md"), ns=(0, 0))
+        self.assertNotEqual(digest_stats(stat_paths(paths)), digest)
+
+
+class TestNoOpBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        os.makedirs(os.path.join(self.root, "content"))
+        os.makedirs(os.path.join(self.root, "static"))
+        self.write(os.path.join("content", "index.md"), "# Home")
+        self.write("template.html", "{{ Title }}{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, text):
+        with open(os.path.join(self.root, rel_path), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def run_main(self, *args):
+        # Reports whether the parser was imported, after the build output
+        code = (
+            "import sys, main\n"
+            f"sys.argv = ['main.py', *{list(args)!r}]\n"
+            "main.main()\n"
+            "print('utils' in sys.modules)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=self.root,
+            env={**os.environ, "PYTHONPATH": SRC_DIR},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return result.stdout.splitlines()
+
+    def test_no_op_skips_the_parser(self):
+        self.assertEqual(self.run_main()[-1], "True")
+        self.assertEqual(self.run_main(), ["Nothing changed", "False"])
+
+    def test_changes_rebuild(self):
+        self.run_main()
+        # A different basepath changes the output
+        self.assertEqual(self.run_main("/site/")[-1], "True")
+        self.assertEqual(self.run_main("/site/")[0], "Nothing changed")
+
+        self.write(os.path.join("content", "index.md"), "# Home page")
+        self.assertEqual(self.run_main("/site/")[-1], "True")
+
+        os.remove(os.path.join(self.root, "docs", "index.html"))
+        self.assertEqual(self.run_main("/site/")[-1], "True")
+        self.assertTrue(os.path.exists(os.path.join(self.root, "docs", "index.html")))
+
+    def test_restored_output_rebuilds(self):
+        self.run_main()
+        # As after checking out docs/ built with another basepath, which
+        # replaces the file rather than editing it in place
+        os.remove(os.path.join(self.root, "docs", "index.html"))
+        self.write(os.path.join("docs", "index.html"), "Home<h1>Home</h1> old")
+        self.assertEqual(self.run_main()[-1], "True")
+        with open(os.path.join(self.root, "docs", "index.html")) as f:
+            self.assertNotIn("old", f.read())
+
+    def test_included_template_change_rebuilds(self):
+        os.makedirs(os.path.join(self.root, "layouts"))
+        self.write(os.path.join("layouts", "foot.html"), "<footer>1</footer>")
+        self.write(
+            "template.html", '{{ Title }}{{ Content }}{% include "layouts/foot.html" %}'
+        )
+        self.run_main()
+        self.assertEqual(self.run_main()[0], "Nothing changed")
+
+        self.write(os.path.join("layouts", "foot.html"), "<footer>2</footer>")
+        self.assertEqual(self.run_main()[-1], "True")
+        with open(os.path.join(self.root, "docs", "index.html")) as f:
+            self.assertIn("<footer>2</footer>", f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
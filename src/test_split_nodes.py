@@ -1,6 +1,14 @@
+import random
+import sys
 import unittest
 from textnode import TextNode, TextType
-from utils import split_nodes_delimiter, split_nodes_image, split_nodes_link
+from utils import (
+    extract_markdown_images,
+    extract_markdown_links,
+    split_nodes_delimiter,
+    split_nodes_image,
+    split_nodes_link,
+)
 
 
 class TestSplitNodesDelimiter(unittest.TestCase):
@@ -637,5 +645,85 @@ class TestIntegration(unittest.TestCase):
         self.assertEqual(result, expected)
 
 
+def split_nodes_recursive(old_nodes, extract, template, text_type):
+    # The original first-match-and-recurse splitter, kept as the reference
+    new_nodes = []
+    for node in old_nodes:
+        if node.text_type is not TextType.TEXT:
+            new_nodes.append(node)
+            continue
+        matches = extract(node.text)
+        if not matches:
+            new_nodes.append(node)
+            continue
+        text, url = matches[0]
+        parts = node.text.split(template.format(text, url), 1)
+        if parts[0]:
+            new_nodes.append(TextNode(parts[0], TextType.TEXT))
+        new_nodes.append(TextNode(text, text_type, url))
+        if parts[1]:
+            rest = [TextNode(parts[1], TextType.TEXT)]
+            new_nodes.extend(split_nodes_recursive(rest, extract, template, text_type))
+    return new_nodes
+
+
+class TestSplitNodesManyMatches(unittest.TestCase):
+    def test_thousands_of_links(self):
+        count = sys.getrecursionlimit() * 5
+        text = ", ".join(f"[page {i}](/pages/{i})" for i in range(count))
+        result = split_nodes_link([TextNode(text, TextType.TEXT)])
+        self.assertEqual(len(result), 2 * count - 1)
+        self.assertEqual(result[0], TextNode("page 0", TextType.LINK, "/pages/0"))
+        self.assertEqual(result[1], TextNode(", ", TextType.TEXT))
+        self.assertEqual(
+            result[-1],
+            TextNode(f"page {count - 1}", TextType.LINK, f"/pages/{count - 1}"),
+        )
+
+    def test_thousands_of_images(self):
+        text = "".join(f"![img {i}](/i/{i}.png)\n" for i in range(5000))
+        result = split_nodes_image([TextNode(text, TextType.TEXT)])
+        self.assertEqual(len(result), 10000)
+        self.assertEqual(result[-1], TextNode("\n", TextType.TEXT))
+
+    def test_random_text_matches_reference(self):
+        generator = random.Random(7)
+        pieces = ["text ", " ", "!", "[", "]", "(", ")", "[x](y)", "![x](y)"]
+        for i in range(2000):
+            # The reference splits the text at the first occurrence of the
+            # matched markdown, which can sit inside an image, so it only agrees
+            # when every link is unique; see test_link_repeated_in_an_image
+            words = [generator.choice(pieces) for _ in range(generator.randint(0, 8))]
+            words.insert(generator.randint(0, len(words)), f"[l{i}](/u{i})")
+            words.insert(generator.randint(0, len(words)), f"![m{i}](/v{i})")
+            nodes = [TextNode("".join(words), TextType.TEXT)]
+
+            images = split_nodes_image(nodes)
+            self.assertEqual(
+                images,
+                split_nodes_recursive(
+                    nodes, extract_markdown_images, "![{}]({})", TextType.IMAGE
+                ),
+            )
+            self.assertEqual(
+                split_nodes_link(images),
+                split_nodes_recursive(
+                    images, extract_markdown_links, "[{}]({})", TextType.LINK
+                ),
+            )
+
+    def test_link_repeated_in_an_image(self):
+        # The reference split at the "[a](b)" inside the image, leaving
+        # ["!", LINK a, " and ", LINK a]; the image is now kept as text
+        nodes = [TextNode("![a](b) and [a](b)", TextType.TEXT)]
+        self.assertEqual(
+            split_nodes_link(nodes),
+            [
+                TextNode("![a](b) and ", TextType.TEXT),
+                TextNode("a", TextType.LINK, "b"),
+            ],
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
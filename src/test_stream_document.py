@@ -0,0 +1,135 @@
+import io
+import os
+import random
+import tempfile
+import unittest
+
+import utils
+from template import UrlRewriter
+from utils import (
+    generate_page,
+    iter_markdown_blocks,
+    markdown_to_blocks,
+    parse_document,
+    stream_document,
+)
+
+
+DOCUMENT = """Intro before the title.
+
+# Title
+
+Paragraph with a [link](/about).
+
+```
+code sample
+```
+
+## Section
+
+* a
+* b
+"""
+
+
+class CountingLines:
+    # Iterable of lines that records how many have been read
+    def __init__(self, text):
+        self.lines = io.StringIO(text)
+        self.read = 0
+
+    def __iter__(self):
+        for line in self.lines:
+            self.read += 1
+            yield line
+
+
+class TestIterMarkdownBlocks(unittest.TestCase):
+    def test_blocks(self):
+        lines = io.StringIO("# T\n\n\n\npara\ngraph  \n\n  \n\n* a\n* b")
+        self.assertEqual(
+            list(iter_markdown_blocks(lines)), ["# T", "para\ngraph", "* a\n* b"]
+        )
+
+    def test_random_text_matches_markdown_to_blocks(self):
+        generator = random.Random(3)
+        pieces = ["\n", "\n\n", " ", "\t", "a", "# h", "```", "\n \n"]
+        for _ in range(3000):
+            text = "".join(
+                generator.choice(pieces) for _ in range(generator.randint(0, 12))
+            )
+            self.assertEqual(
+                list(iter_markdown_blocks(io.StringIO(text))),
+                markdown_to_blocks(text),
+                msg=repr(text),
+            )
+
+
+class TestStreamDocument(unittest.TestCase):
+    def test_matches_parse_document(self):
+        urls = UrlRewriter("/site/")
+        expected = parse_document(DOCUMENT, urls=urls)
+        document = stream_document(io.StringIO(DOCUMENT), urls=urls)
+        self.assertEqual(document.title, "Title")
+        self.assertEqual(document.node.to_html(), expected.node.to_html())
+        self.assertEqual(document.headings, expected.headings)
+        self.assertEqual(document.block_count, expected.block_count)
+
+    def test_reads_only_up_to_title_before_rendering(self):
+        lines = CountingLines(DOCUMENT)
+        document = stream_document(lines)
+        self.assertEqual(lines.read, 4)
+        self.assertEqual(document.headings, [(1, "Title")])
+        document.node.to_html()
+        self.assertEqual(lines.read, DOCUMENT.count("\n"))
+        self.assertEqual(document.headings, [(1, "Title"), (2, "Section")])
+
+    def test_parse_document_accepts_lines(self):
+        document = parse_document(io.StringIO(DOCUMENT))
+        self.assertEqual(
+            document.node.to_html(), parse_document(DOCUMENT).node.to_html()
+        )
+
+    def test_generate_page_streams_large_pages(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "page.md")
+            template = os.path.join(tmp, "template.html")
+            with open(source, "w", encoding="utf-8") as f:
+                f.write(DOCUMENT)
+            with open(template, "w", encoding="utf-8") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+
+            outputs = []
+            threshold = utils.STREAM_THRESHOLD
+            for stream_threshold in (threshold, 0):
+                utils.STREAM_THRESHOLD = stream_threshold
+                try:
+                    dest = os.path.join(tmp, f"page{stream_threshold}.html")
+                    generate_page(source, template, dest, "/site/")
+                finally:
+                    utils.STREAM_THRESHOLD = threshold
+                with open(dest, encoding="utf-8") as f:
+                    outputs.append(f.read())
+            self.assertEqual(outputs[0], outputs[1])
+            self.assertIn('<a href="/site/about">', outputs[1])
+
+    def test_generate_page_streamed_without_title_raises(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "page.md")
+            template = os.path.join(tmp, "template.html")
+            with open(source, "w", encoding="utf-8") as f:
+                f.write("no title\n\nat all")
+            with open(template, "w", encoding="utf-8") as f:
+                f.write("{{ Title }}{{ Content }}")
+            threshold = utils.STREAM_THRESHOLD
+            utils.STREAM_THRESHOLD = 0
+            try:
+                with self.assertRaises(Exception):
+                    generate_page(source, template, os.path.join(tmp, "page.html"))
+            finally:
+                utils.STREAM_THRESHOLD = threshold
+            self.assertFalse(os.path.exists(os.path.join(tmp, "page.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+
+from utils import sync_directory
+
+
+class TestSyncDirectory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def test_first_sync_copies_everything(self):
+        synced, copied, deleted, _ = sync_directory(self.static, self.docs)
+        self.assertEqual(sorted(synced), [os.path.join("images", "a.png"), "index.css"])
+        self.assertEqual((copied, deleted), (2, 0))
+        self.assertEqual(self.read(os.path.join(self.docs, "index.css")), "body {}")
+        self.assertEqual(
+            os.stat(os.path.join(self.static, "index.css")).st_mtime_ns,
+            os.stat(os.path.join(self.docs, "index.css")).st_mtime_ns,
+        )
+
+    def test_unchanged_files_are_skipped(self):
+        sync_directory(self.static, self.docs)
+        _, copied, _, _ = sync_directory(self.static, self.docs)
+        self.assertEqual(copied, 0)
+
+    def test_changed_file_is_copied(self):
+        sync_directory(self.static, self.docs)
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        _, copied, _, _ = sync_directory(self.static, self.docs)
+        self.assertEqual(copied, 1)
+        self.assertEqual(
+            self.read(os.path.join(self.docs, "index.css")), "body { margin: 0 }"
+        )
+
+    def test_check_hash_catches_same_size_and_mtime(self):
+        sync_directory(self.static, self.docs)
+        dest_file = os.path.join(self.docs, "index.css")
+        stat = os.stat(dest_file)
+        self.write(dest_file, "xxxx {}")
+        os.utime(dest_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        _, copied, _, _ = sync_directory(self.static, self.docs)
+        self.assertEqual(copied, 0)
+        _, copied, _, _ = sync_directory(self.static, self.docs, check_hash=True)
+        self.assertEqual(copied, 1)
+        self.assertEqual(self.read(dest_file), "body {}")
+
+    def test_orphans_deleted_and_other_files_kept(self):
+        synced, _, _, _ = sync_directory(self.static, self.docs)
+        page = os.path.join(self.docs, "index.html")
+        self.write(page, "<p>generated</p>")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+
+        synced, copied, deleted, _ = sync_directory(self.static, self.docs, synced)
+        self.assertEqual(synced, ["index.css"])
+        self.assertEqual((copied, deleted), (0, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "images", "a.png")))
+        self.assertTrue(os.path.exists(page))
+
+    def test_link(self):
+        sync_directory(self.static, self.docs, link=True)
+        self.assertTrue(
+            os.path.samefile(
+                os.path.join(self.static, "index.css"),
+                os.path.join(self.docs, "index.css"),
+            )
+        )
+        _, copied, _, _ = sync_directory(self.static, self.docs, link=True)
+        self.assertEqual(copied, 0)
+
+    def test_copied_bytes(self):
+        _, _, _, copied_bytes = sync_directory(self.static, self.docs)
+        self.assertEqual(copied_bytes, len("body {}") + len("png"))
+        _, _, _, copied_bytes = sync_directory(self.static, self.docs)
+        self.assertEqual(copied_bytes, 0)
+
+    def test_linked_files_add_no_bytes(self):
+        _, copied, _, copied_bytes = sync_directory(self.static, self.docs, link=True)
+        self.assertEqual((copied, copied_bytes), (2, 0))
+
+    def test_missing_source_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            sync_directory(os.path.join(self.tmp.name, "missing"), self.docs)
+
+
+if __name__ == "__main__":
+    unittest.main()
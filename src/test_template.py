@@ -0,0 +1,171 @@
+import os
+import tempfile
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from template import (
+    CompiledTemplate,
+    TemplateLoader,
+    UrlRewriter,
+    parse_template,
+    rewrite_url,
+)
+
+
+TEMPLATE = """<html>
+<head><title>{{ Title }}</title><link href="/index.css" rel="stylesheet" /></head>
+<body><article>{{ Content }}</article><img src="/logo.png" /></body>
+</html>"""
+
+
+class TestCompiledTemplate(unittest.TestCase):
+    def test_render_fills_slots(self):
+        template = CompiledTemplate(TEMPLATE)
+        result = template.render(Title="Hello", Content="<p>World</p>")
+        self.assertEqual(
+            result,
+            TEMPLATE.replace("{{ Title }}", "Hello").replace(
+                "{{ Content }}", "<p>World</p>"
+            ),
+        )
+
+    def test_slot_positions(self):
+        template = CompiledTemplate("a{{ Title }}b{{ Content }}c")
+        self.assertEqual(template.parts, ["a", None, "b", None, "c"])
+        self.assertEqual(template.slots, [(1, "Title"), (3, "Content")])
+
+    def test_repeated_slot(self):
+        template = CompiledTemplate("{{ Title }}|{{ Title }}")
+        self.assertEqual(template.render(Title="x"), "x|x")
+
+    def test_unknown_placeholder_left_alone(self):
+        template = CompiledTemplate("{{ Author }} {{ Title }}")
+        self.assertEqual(template.render(Title="x"), "{{ Author }} x")
+
+    def test_basepath_applied_to_static_parts(self):
+        template = CompiledTemplate(TEMPLATE, "/site/")
+        self.assertIn('href="/site/index.css"', template.parts[2])
+        self.assertIn('src="/site/logo.png"', template.parts[4])
+
+    def test_content_inserted_unchanged(self):
+        # The basepath is applied when the nodes are built, not to the output
+        template = CompiledTemplate("{{ Content }}", "/site/")
+        self.assertEqual(
+            template.render(Content='<code>href="/blog"</code>'),
+            '<code>href="/blog"</code>',
+        )
+
+    def test_render_into_streams_nodes(self):
+        template = CompiledTemplate("<t>{{ Title }}</t>{{ Content }}", "/site/")
+        node = ParentNode("p", [LeafNode("a", "home", {"href": "/site/"})])
+        chunks = []
+        template.render_into(chunks.append, Title="x", Content=node)
+        self.assertEqual(
+            chunks, ["<t>", "x", "</t>", "<p>", '<a href="/site/">home</a>', "</p>"]
+        )
+
+    def test_rewrite_url(self):
+        self.assertEqual(rewrite_url("/blog/", "/site/"), "/site/blog/")
+        self.assertEqual(rewrite_url("/", "/site/"), "/site/")
+        self.assertEqual(rewrite_url("https://x.org/", "/site/"), "https://x.org/")
+        self.assertEqual(rewrite_url("images/a.png", "/site/"), "images/a.png")
+
+    def test_url_rewriter_assets(self):
+        urls = UrlRewriter("/site/", {"/index.css": "/index.abc.css"})
+        self.assertEqual(urls.rewrite("/index.css"), "/site/index.abc.css")
+        self.assertEqual(urls.rewrite("/index.css?v=2#x"), "/site/index.abc.css?v=2#x")
+        self.assertEqual(urls.rewrite("/other.css"), "/site/other.css")
+        self.assertEqual(urls.rewrite("index.css"), "index.css")
+        self.assertNotEqual(urls.key, UrlRewriter("/site/").key)
+        self.assertEqual(UrlRewriter("/site/").key, "/site/")
+
+    def test_assets_applied_to_static_parts(self):
+        assets = {"/index.css": "/index.abc.css", "/logo.png": "/logo.def.png"}
+        template = CompiledTemplate(TEMPLATE, "/site/", assets)
+        self.assertIn('href="/site/index.abc.css"', template.parts[2])
+        self.assertIn('src="/site/logo.def.png"', template.parts[4])
+
+    def test_missing_slot_raises(self):
+        template = CompiledTemplate("{{ Title }}{{ Content }}")
+        with self.assertRaises(KeyError):
+            template.render(Title="x")
+
+
+class TestTemplateLoader(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.loader = TemplateLoader(self.tmp.name)
+        self.write(
+            "base.html",
+            '{% include "header.html" %}'
+            "{% block main %}<main>{% block body %}{{ Content }}{% endblock %}"
+            "</main>{% endblock %}<footer/>",
+        )
+        self.write("header.html", "<h1>{% block heading %}Site{% endblock %}</h1>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        with open(os.path.join(self.tmp.name, name), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def source(self, name):
+        return self.loader.source(os.path.join(self.tmp.name, name))
+
+    def test_includes_and_default_blocks(self):
+        self.assertEqual(
+            self.source("base.html"),
+            "<h1>Site</h1><main>{{ Content }}</main><footer/>",
+        )
+
+    def test_override_nested_blocks(self):
+        # Text outside blocks of an extending template is ignored
+        self.write(
+            "blog.html",
+            '{% extends "base.html" %}ignored'
+            "{% block heading %}Blog{% endblock %}"
+            "{% block body %}<article>{{ Content }}</article>{% endblock %}",
+        )
+        self.assertEqual(
+            self.source("blog.html"),
+            "<h1>Blog</h1><main><article>{{ Content }}</article></main><footer/>",
+        )
+        self.write(
+            "post.html",
+            '{% extends "blog.html" %}{% block main %}<p>{{ Title }}</p>{% endblock %}',
+        )
+        self.assertEqual(
+            self.source("post.html"), "<h1>Blog</h1><p>{{ Title }}</p><footer/>"
+        )
+
+    def test_files_are_read_once(self):
+        self.write("a.html", '{% include "header.html" %}{% include "header.html" %}')
+        self.source("a.html")
+        self.source("base.html")
+        self.assertEqual(len(self.loader.parsed), 3)
+
+    def test_stats_of_files_read(self):
+        self.source("base.html")
+        base = os.path.join(self.tmp.name, "base.html")
+        header = os.path.join(self.tmp.name, "header.html")
+        self.assertEqual(sorted(self.loader.stats), [base, header])
+        self.assertEqual(self.loader.stats[header][0], os.path.getsize(header))
+
+    def test_include_cycle(self):
+        self.write("a.html", '{% include "b.html" %}')
+        self.write("b.html", '{% include "a.html" %}')
+        with self.assertRaisesRegex(ValueError, "includes itself"):
+            self.source("a.html")
+
+    def test_unbalanced_blocks(self):
+        with self.assertRaisesRegex(ValueError, "not closed"):
+            parse_template("{% block a %}", "t.html")
+        with self.assertRaisesRegex(ValueError, "without a block"):
+            parse_template("{% endblock %}", "t.html")
+        with self.assertRaisesRegex(ValueError, "must come first"):
+            parse_template('x{% extends "base.html" %}', "t.html")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import pickle
 import unittest
 
 from textnode import TextNode, TextType
@@ -34,6 +35,16 @@ class TestTextNode(unittest.TestCase):
         self.assertNotEqual(node2, node3)
         self.assertNotEqual(node3, node4)
 
+    def test_slots(self):
+        node = TextNode("This is a text node", TextType.BOLD)
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.extra = "nope"
+
+    def test_pickle(self):
+        node = TextNode("link", TextType.LINK, "https://localhost")
+        self.assertEqual(pickle.loads(pickle.dumps(node)), node)
+
 
 if __name__ == "__main__":
     unittest.main()
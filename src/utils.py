@@ -1,9 +1,25 @@
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
+from itertools import chain
+import hashlib
 import os
 import re
 import shutil
+import time
 from textnode import TextNode, TextType
 from htmlnode import LeafNode, ParentNode
+from blockcache import BlockCache
+from document import Document
+from manifest import generator_digest, hash_file
+from outputwriter import OutputWriter
+from pagecache import page_cache_key
+from profiler import BuildProfile, null_stage
+from search import SearchIndex, add_node_terms
+from template import Layouts, load_template
+
+
+# Pages larger than this many bytes are rendered without reading them whole
+STREAM_THRESHOLD = 16 * 1024 * 1024
 
 
 class BlockType(Enum):
@@ -16,48 +32,441 @@ class BlockType(Enum):
 
 
 def generate_pages_recursive(
-    dir_path_content, template_path, dest_dir_path, basepath="/"
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    basepath="/",
+    *,
+    manifest=None,
+    jobs=1,
+    profile=None,
+    cache=None,
+    assets=None,
+    index=None,
+    page_cache=None,
+    minify=False,
 ):
-    for entry in os.listdir(dir_path_content):
+    pages = discover_pages(dir_path_content, dest_dir_path)
+    return generate_pages(
+        pages,
+        template_path,
+        basepath,
+        manifest=manifest,
+        jobs=jobs,
+        profile=profile,
+        cache=cache,
+        assets=assets,
+        index=index,
+        page_cache=page_cache,
+        content_dir=dir_path_content,
+        minify=minify,
+    )
+
+
+def discover_pages(dir_path_content, dest_dir_path):
+    """
+    Find every markdown page under a content directory.
+
+    Args:
+        dir_path_content: Path to the content directory
+        dest_dir_path: Path to the directory the pages are generated into
+
+    Returns:
+        List of (source_path, dest_path) tuples, sorted by source path
+    """
+    pages = []
+    for entry in sorted(os.listdir(dir_path_content)):
         entry_path = os.path.join(dir_path_content, entry)
 
         if os.path.isfile(entry_path) and entry.endswith(".md"):
             dest_filename = entry[:-3] + ".html"
-            dest_path = os.path.join(dest_dir_path, dest_filename)
-            generate_page(entry_path, template_path, dest_path, basepath)
+            pages.append((entry_path, os.path.join(dest_dir_path, dest_filename)))
 
         elif os.path.isdir(entry_path):
             new_dest = os.path.join(dest_dir_path, entry)
-            generate_pages_recursive(entry_path, template_path, new_dest, basepath)
+            pages.extend(discover_pages(entry_path, new_dest))
+    return pages
 
 
-def generate_page(from_path, template_path, dest_path, basepath="/"):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+def page_shard(source_path, dir_path_content, count):
+    """
+    Shard a page belongs to when a build is split into count shards.
 
-    with open(from_path, "r", encoding="utf-8") as f:
-        markdown_content = f.read()
+    The shard only depends on the page's path relative to the content
+    directory, so every machine assigns every page to the same shard.
 
-    with open(template_path, "r", encoding="utf-8") as f:
-        template_content = f.read()
+    Args:
+        source_path: Path to the page's markdown file
+        dir_path_content: Path to the content directory
+        count: Number of shards
 
-    html_text = markdown_to_html_node(markdown_content).to_html()
-    title = extract_title(markdown_content)
+    Returns:
+        Shard number, from 1 to count
+    """
+    rel_path = os.path.relpath(source_path, dir_path_content).replace(os.sep, "/")
+    digest = hashlib.sha256(rel_path.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def select_shard(pages, dir_path_content, shard):
+    # shard is a (number, count) tuple as given to --shard
+    number, count = shard
+    return [
+        (source_path, dest_path)
+        for source_path, dest_path in pages
+        if page_shard(source_path, dir_path_content, count) == number
+    ]
+
+
+def generate_pages(
+    pages,
+    template_path,
+    basepath="/",
+    *,
+    manifest=None,
+    jobs=1,
+    profile=None,
+    cache=None,
+    assets=None,
+    index=None,
+    page_cache=None,
+    content_dir=None,
+    minify=False,
+):
+    """
+    Generate a list of pages, optionally on a pool of worker processes.
 
-    # Replace placeholders in template
-    final_html = template_content.replace("{{ Title }}", title)
-    final_html = final_html.replace("{{ Content }}", html_text)
+    Every page is attempted even if others fail; failures are reported per
+    page once all pages are done.
 
-    # Replace root-relative paths with basepath
-    final_html = final_html.replace('href="/', f'href="{basepath}')
-    final_html = final_html.replace('src="/', f'src="{basepath}')
+    Args:
+        pages: List of (source_path, dest_path) tuples
+        template_path: Path to the root HTML template
+        basepath: Root path the site is served from
+        manifest: Optional BuildManifest used to skip unchanged pages
+        jobs: Number of worker processes, 0 for one per CPU
+        profile: Optional BuildProfile collecting stage and page timings
+        cache: Optional BlockCache shared by the pages; with jobs, each
+            worker keeps its own cache of the same size
+        assets: Optional dict of asset path to fingerprinted path, applied
+            to the URLs in the template and the pages
+        index: Optional SearchIndex receiving the terms of rendered pages;
+            it is trimmed to the given pages
+        page_cache: Optional PageCache of rendered bodies, shared with the
+            workers through the filesystem
+        content_dir: Content directory the pages are in; its directories
+            can override the root template with a _template.html layout
+        minify: Strip comments and collapse whitespace while pages are written
 
-    # Create destination directory if it doesn't exist
-    dest_dir = os.path.dirname(dest_path)
-    if dest_dir:
-        os.makedirs(dest_dir, exist_ok=True)
+    Returns:
+        Dict with the number of pages, how many were rendered (not skipped
+        by the manifest), how many output files were actually written and
+        the templates read, as a dict of path to (size, mtime_ns)
 
-    with open(dest_path, "w", encoding="utf-8") as f:
-        f.write(final_html)
+    Raises:
+        Exception: If any page failed to generate
+    """
+    stage = null_stage if profile is None else profile.stage
+
+    # Every layout is compiled once, however many pages use it
+    with stage("compile_template"):
+        layouts = Layouts(template_path, content_dir, basepath, assets, minify)
+        page_layouts = [layouts.for_page(source_path) for source_path, _ in pages]
+    if profile is not None:
+        profile.bytes_read += sum(size for size, _ in layouts.loader.stats.values())
+    # Covers the basepath and the asset names, which both change the output
+    url_key = layouts.root.urls.key
+
+    if index is not None:
+        index.retain(dest_path for _, dest_path in pages)
+
+    # Skip pages whose source, template and URLs are unchanged
+    stale_pages = []
+    with stage("check_manifest"):
+        for (source_path, dest_path), layout in zip(pages, page_layouts):
+            if manifest is None:
+                stale_pages.append((source_path, dest_path, None, layout))
+                continue
+            source_hash = manifest.hash_source(source_path)
+            # The hash of the resolved layout covers its partials and parents
+            template_hash = layout[1].source_hash
+            if manifest.is_fresh(
+                source_path, dest_path, source_hash, template_hash, url_key
+            ) and (index is None or index.has_page(dest_path)):
+                print(f"Skipping unchanged page {source_path}")
+                continue
+            stale_pages.append((source_path, dest_path, source_hash, layout))
+
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+
+    if jobs == 1 or len(stale_pages) <= 1:
+        results = []
+        for source_path, dest_path, _, (layout_path, template) in stale_pages:
+            try:
+                output_hash, written = generate_page(
+                    source_path,
+                    layout_path,
+                    dest_path,
+                    basepath,
+                    template,
+                    profile,
+                    cache,
+                    index=index,
+                    page_cache=page_cache,
+                )
+                results.append(((output_hash, written, None, None, None), None))
+            except Exception as e:
+                results.append((None, e))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=init_page_worker,
+            initargs=(None if cache is None else cache.max_size,),
+        ) as executor:
+            futures = []
+            for source_path, dest_path, _, (layout_path, template) in stale_pages:
+                futures.append(
+                    executor.submit(
+                        generate_page_in_worker,
+                        source_path,
+                        layout_path,
+                        dest_path,
+                        basepath,
+                        template,
+                        profile is not None,
+                        index is not None,
+                        page_cache,
+                    )
+                )
+            # Collect in submission order so the build is deterministic
+            results = []
+            for future in futures:
+                try:
+                    results.append((future.result(), None))
+                except Exception as e:
+                    results.append((None, e))
+
+    errors = []
+    written_count = 0
+    for (source_path, dest_path, source_hash, layout), (result, error) in zip(
+        stale_pages, results
+    ):
+        if error is not None:
+            errors.append((source_path, error))
+            continue
+        output_hash, written, page_profile, cache_stats, indexed_pages = result
+        if written:
+            written_count += 1
+        if page_profile is not None:
+            profile.merge(page_profile)
+        if cache_stats is not None:
+            cache.merge_stats(cache_stats)
+        if indexed_pages is not None:
+            index.merge(indexed_pages)
+        if manifest is not None:
+            manifest.record(
+                source_path,
+                dest_path,
+                source_hash,
+                layout[1].source_hash,
+                url_key,
+                output_hash,
+            )
+
+    if errors:
+        for source_path, error in errors:
+            print(f"Failed to generate {source_path}: {error}")
+        raise Exception(f"{len(errors)} of {len(pages)} pages failed to generate")
+
+    return {
+        "pages": len(pages),
+        "rendered": len(stale_pages),
+        "written": written_count,
+        "templates": layouts.loader.stats,
+    }
+
+
+def generate_page(
+    from_path,
+    template_path,
+    dest_path,
+    basepath="/",
+    template=None,
+    profile=None,
+    cache=None,
+    assets=None,
+    index=None,
+    page_cache=None,
+):
+    """
+    Generate one HTML page from a markdown file.
+
+    An existing output with identical content is left untouched. With an
+    index, the page's search terms are counted while it is parsed and added
+    to it. With a page cache, a page whose markdown was rendered before is
+    not parsed again.
+
+    Returns:
+        Tuple of (SHA-256 hex digest of the page, whether the file was written)
+    """
+    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    page_start = time.perf_counter()
+    stage = null_stage if profile is None else profile.stage
+
+    # Callers generating many pages pass the template compiled once per build
+    if template is None:
+        with stage("compile_template"):
+            template = load_template(template_path, basepath, assets)
+    urls = template.urls
+
+    with open(from_path, "r", encoding="utf-8") as f:
+        size = os.fstat(f.fileno()).st_size
+        if profile is not None:
+            profile.bytes_read += size
+
+        # Very large pages are parsed block by block while they are written
+        streamed = size > STREAM_THRESHOLD
+        if streamed:
+            document = stream_document(f, cache, urls, index is not None)
+        else:
+            with stage("read"):
+                markdown_content = f.read()
+            document = None
+            if page_cache is not None:
+                with stage("page_cache"):
+                    key = page_cache_key(
+                        generator_digest(), markdown_content, urls.key
+                    )
+                    document = cached_document(page_cache.get(key), index is not None)
+            if document is None:
+                # One walk over the blocks gives both the content and the title
+                with stage("parse_document"):
+                    document = parse_document(
+                        markdown_content, cache, urls, index is not None
+                    )
+                if page_cache is not None and document.title is not None:
+                    # Render the body once, for the cache and for the page
+                    with stage("page_cache"):
+                        document.node = document.node.to_html()
+                        page_cache.put(key, document_cache_entry(document))
+        if document.title is None:
+            raise Exception("No h1 header found in markdown")
+        html_node = document.node
+        title = document.title
+
+        # Create destination directory if it doesn't exist
+        dest_dir = os.path.dirname(dest_path)
+        if dest_dir:
+            os.makedirs(dest_dir, exist_ok=True)
+
+        # Stream the page into the file, or just compare it if it is unchanged
+        writer = OutputWriter(dest_path)
+        try:
+            if profile is None:
+                template.render_into(writer.write, Title=title, Content=html_node)
+                written = writer.close()
+            elif streamed:
+                # Parsing happens during rendering, so time them together
+                with stage("parse_render_write"):
+                    template.render_into(writer.write, Title=title, Content=html_node)
+                    written = writer.close()
+            else:
+                # Render into memory first so rendering and writing are timed apart
+                chunks = []
+                with stage("render"):
+                    template.render_into(chunks.append, Title=title, Content=html_node)
+                with stage("write"):
+                    for chunk in chunks:
+                        writer.write(chunk)
+                    written = writer.close()
+        except BaseException:
+            writer.abort()
+            raise
+
+    # Streamed documents have all their terms only after rendering
+    if index is not None:
+        index.add_page(dest_path, title, document.terms)
+    if profile is not None:
+        if written:
+            profile.bytes_written += writer.size
+        profile.add_page(from_path, time.perf_counter() - page_start)
+    return writer.hexdigest(), written
+
+
+def document_cache_entry(document):
+    # Page cache entry of a Document whose node was rendered to a string
+    return {
+        "title": document.title,
+        "body": document.node,
+        "headings": document.headings,
+        "block_count": document.block_count,
+        "terms": document.terms,
+    }
+
+
+def cached_document(entry, collect_terms=False):
+    # Document from a page cache entry, or None if it cannot be used
+    if entry is None or (collect_terms and entry["terms"] is None):
+        return None
+    headings = [(level, text) for level, text in entry["headings"]]
+    return Document(
+        entry["body"], entry["title"], headings, entry["block_count"], entry["terms"]
+    )
+
+
+# Block cache of the current pool worker process
+worker_cache = None
+
+
+def init_page_worker(cache_size):
+    global worker_cache
+    worker_cache = None if cache_size is None else BlockCache(cache_size)
+
+
+def generate_page_in_worker(
+    from_path,
+    template_path,
+    dest_path,
+    basepath,
+    template,
+    profiled,
+    indexed,
+    page_cache,
+):
+    # The parent's profile, cache and index are out of reach here, so collect
+    # into local ones and send the results back with the output hash
+    profile = BuildProfile() if profiled else None
+    index = SearchIndex(None) if indexed else None
+    cache = worker_cache
+    cache_stats = None
+    if cache is not None:
+        before = cache.stats()
+
+    output_hash, written = generate_page(
+        from_path,
+        template_path,
+        dest_path,
+        basepath,
+        template,
+        profile,
+        cache,
+        index=index,
+        page_cache=page_cache,
+    )
+
+    if cache is not None:
+        after = cache.stats()
+        cache_stats = {}
+        for name in ("hits", "misses", "evictions"):
+            cache_stats[name] = after[name] - before[name]
+    return (
+        output_hash,
+        written,
+        None if profile is None else profile.to_dict(),
+        cache_stats,
+        None if index is None else index.pages,
+    )
 
 
 def extract_title(markdown):
@@ -130,46 +539,191 @@ def copy_directory_recursive(source_dir, dest_dir):
             print(f"Copied: {dest_file}")
 
 
+def sync_directory(
+    source_dir,
+    dest_dir,
+    previous_files=None,
+    check_hash=False,
+    link=False,
+    rename=None,
+):
+    """
+    Incrementally sync a source directory into a destination directory.
+
+    Unlike copy_directory_recursive, the destination is not emptied: files
+    whose size and modification time match are left alone, and only files
+    that were synced before but no longer exist in the source are deleted.
+    Anything else in the destination, such as generated pages, is kept.
+
+    Args:
+        source_dir: Path to the source directory
+        dest_dir: Path to the destination directory
+        previous_files: Relative paths synced by the previous run, if known
+        check_hash: Also compare file contents before skipping a file
+        link: Hardlink files instead of copying them where possible
+        rename: Optional callable taking a file's relative path and source
+            path and returning the relative path to sync it to and the path
+            of the file to sync there, e.g. a rewritten copy of the source
+
+    Returns:
+        Tuple of (synced destination relative paths, copied count, deleted
+        count, bytes copied); hardlinked files count as copied but add no
+        bytes
+    """
+    if not os.path.exists(source_dir):
+        raise FileNotFoundError(f"Source directory does not exist: {source_dir}")
+
+    synced_files = []
+    copied = 0
+    copied_bytes = 0
+    for root, dirs, files in os.walk(source_dir):
+        rel_path = os.path.relpath(root, source_dir)
+        if rel_path == ".":
+            dest_root = dest_dir
+        else:
+            dest_root = os.path.join(dest_dir, rel_path)
+        os.makedirs(dest_root, exist_ok=True)
+
+        for file in files:
+            src_file = os.path.join(root, file)
+            rel_file = os.path.normpath(os.path.join(rel_path, file))
+            if rename is not None:
+                rel_file, src_file = rename(rel_file, src_file)
+            dest_file = os.path.join(dest_dir, rel_file)
+            synced_files.append(rel_file)
+
+            if is_file_unchanged(src_file, dest_file, check_hash):
+                continue
+            copied_bytes += sync_file(src_file, dest_file, link)
+            copied += 1
+            print(f"Copied: {dest_file}")
+
+    # Only remove files that this sync put there in the first place
+    deleted = 0
+    for rel_file in set(previous_files or []) - set(synced_files):
+        dest_file = os.path.join(dest_dir, rel_file)
+        if os.path.isfile(dest_file):
+            os.remove(dest_file)
+            deleted += 1
+            print(f"Deleted: {dest_file}")
+
+    return synced_files, copied, deleted, copied_bytes
+
+
+def is_file_unchanged(src_file, dest_file, check_hash=False):
+    try:
+        src_stat = os.stat(src_file)
+        dest_stat = os.stat(dest_file)
+    except FileNotFoundError:
+        return False
+    if os.path.samestat(src_stat, dest_stat):
+        # Hardlinked by a previous sync
+        return True
+    if src_stat.st_size != dest_stat.st_size:
+        return False
+    if check_hash:
+        return hash_file(src_file) == hash_file(dest_file)
+    return src_stat.st_mtime_ns == dest_stat.st_mtime_ns
+
+
+def sync_file(src_file, dest_file, link=False):
+    """
+    Copy or hardlink a file over any existing destination.
+
+    Returns:
+        Number of bytes copied, 0 if the file was hardlinked
+    """
+    if os.path.lexists(dest_file):
+        os.remove(dest_file)
+
+    if link:
+        try:
+            os.link(src_file, dest_file)
+            return 0
+        except OSError:
+            # Different filesystem or no hardlink support, fall back to a copy
+            pass
+
+    copy_file_contents(src_file, dest_file)
+    shutil.copystat(src_file, dest_file)
+    return os.path.getsize(dest_file)
+
+
+def copy_file_contents(src_file, dest_file):
+    if not hasattr(os, "copy_file_range"):
+        shutil.copyfile(src_file, dest_file)
+        return
+
+    with open(src_file, "rb") as src, open(dest_file, "wb") as dest:
+        try:
+            # Let the kernel copy (or reflink) the data without a userspace round trip
+            while os.copy_file_range(src.fileno(), dest.fileno(), 1 << 30):
+                pass
+        except OSError:
+            src.seek(0)
+            dest.seek(0)
+            dest.truncate()
+            shutil.copyfileobj(src, dest)
+
+
 def block_to_block_type(block):
-    lines = block.split("\n")
+    block_type, _ = classify_block(block)
+    return block_type
 
-    if block.startswith("```\n") and block.rstrip().endswith("```"):
-        return BlockType.CODE
 
-    if re.match(r"^#{1,6} ", block):
-        return BlockType.HEADING
+def classify_block(block):
+    """
+    Decide a block's type in a single walk over its lines.
 
-    all_lines_start_with_quote = True
-    for line in lines:
-        if not (line.startswith(">")):
-            all_lines_start_with_quote = False
-            break
-    if all_lines_start_with_quote:
-        return BlockType.QUOTE
+    The first line decides which of quote, unordered list or ordered list
+    the block can still be, so every later line is checked against one
+    prefix only, and the prefix is stripped on the way.
 
-    all_lines_are_unordered = True
-    for line in lines:
-        if not (line.startswith("* ") or line.startswith("- ")):
-            all_lines_are_unordered = False
-            break
-    if all_lines_are_unordered:
-        return BlockType.UNORDERED_LIST
+    Args:
+        block: String containing one markdown block
 
-    all_lines_are_ordered = True
-    expected_number = 1
-    for line in lines:
-        expected_prefix = str(expected_number) + ". "
-        if not (line.startswith(expected_prefix)):
-            all_lines_are_ordered = False
-            break
-        expected_number += 1
-    if all_lines_are_ordered:
-        return BlockType.ORDERED_LIST
+    Returns:
+        Tuple of (BlockType, lines). For quotes and lists, lines holds each
+        line's text with its prefix removed; otherwise it is None.
+    """
+    if block.startswith("```\n") and block.rstrip().endswith("```"):
+        return BlockType.CODE, None
+
+    if HEADING_PATTERN.match(block):
+        return BlockType.HEADING, None
+
+    lines = block.split("\n")
+    first_line = lines[0]
+    if first_line.startswith(">"):
+        block_type = BlockType.QUOTE
+    elif first_line.startswith("* ") or first_line.startswith("- "):
+        block_type = BlockType.UNORDERED_LIST
+    elif first_line.startswith("1. "):
+        block_type = BlockType.ORDERED_LIST
+    else:
+        return BlockType.PARAGRAPH, None
 
-    return BlockType.PARAGRAPH
+    stripped_lines = []
+    for number, line in enumerate(lines, 1):
+        if block_type is BlockType.QUOTE:
+            if not line.startswith(">"):
+                return BlockType.PARAGRAPH, None
+            # Remove the '>' and any immediately following whitespace
+            stripped_lines.append(line[1:].lstrip())
+        elif block_type is BlockType.UNORDERED_LIST:
+            if not (line.startswith("* ") or line.startswith("- ")):
+                return BlockType.PARAGRAPH, None
+            stripped_lines.append(line[2:])
+        else:
+            prefix = f"{number}. "
+            if not line.startswith(prefix):
+                return BlockType.PARAGRAPH, None
+            stripped_lines.append(line[len(prefix) :].lstrip())
 
+    return block_type, stripped_lines
 
-def text_node_to_html_node(text_node: TextNode):
+
+def text_node_to_html_node(text_node: TextNode, urls=None):
     if text_node.text_type not in TextType:
         raise TypeError
     if text_node.text_type is TextType.TEXT:
@@ -181,9 +735,11 @@ def text_node_to_html_node(text_node: TextNode):
     elif text_node.text_type is TextType.CODE:
         return LeafNode("code", text_node.text)
     elif text_node.text_type is TextType.LINK:
-        return LeafNode("a", text_node.text, {"href": text_node.url})
+        href = text_node.url if urls is None else urls.rewrite(text_node.url)
+        return LeafNode("a", text_node.text, {"href": href})
     elif text_node.text_type is TextType.IMAGE:
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+        src = text_node.url if urls is None else urls.rewrite(text_node.url)
+        return LeafNode("img", "", {"src": src, "alt": text_node.text})
 
 
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
@@ -249,86 +805,149 @@ def split_text_by_delimiter(text, delimiter, text_type):
     return result_nodes
 
 
+HEADING_PATTERN = re.compile(r"#{1,6} ")
+IMAGE_PATTERN = re.compile(r"!\[([^\]]*)\]\(([^\)]*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
+# Inline delimiters in the order they take precedence
+INLINE_DELIMITERS = (
+    ("`", TextType.CODE),
+    ("**", TextType.BOLD),
+    ("*", TextType.ITALIC),
+    ("_", TextType.ITALIC),
+)
+
+
 def extract_markdown_images(text):
-    matches = re.findall(r"!\[([^\]]*)\]\(([^\)]*)\)", text)
+    matches = IMAGE_PATTERN.findall(text)
     return matches
 
 
 def extract_markdown_links(text):
-    matches = re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    matches = LINK_PATTERN.findall(text)
     return matches
 
 
 def split_nodes_image(old_nodes):
-    new_nodes = []
+    return split_nodes_by_pattern(old_nodes, IMAGE_PATTERN, TextType.IMAGE)
 
-    for node in old_nodes:
-        if node.text_type is not TextType.TEXT:
-            new_nodes.extend([node])
-            continue
-        image_list = extract_markdown_images(node.text)
-        if len(image_list) == 0:
-            new_nodes.extend([node])
-            continue
-        first_image = image_list[0]
-        image_markdown = f"![{first_image[0]}]({first_image[1]})"
 
-        parts = node.text.split(image_markdown, 1)
+def split_nodes_link(old_nodes):
+    return split_nodes_by_pattern(old_nodes, LINK_PATTERN, TextType.LINK)
 
-        if parts[0]:
-            new_nodes.extend([TextNode(parts[0], TextType.TEXT)])
 
-        new_nodes.extend([TextNode(first_image[0], TextType.IMAGE, first_image[1])])
+def split_nodes_by_pattern(old_nodes, pattern, text_type):
+    """
+    Split TEXT nodes on every match of an image or link pattern.
 
-        if parts[1]:
-            results = split_nodes_image([TextNode(parts[1], TextType.TEXT)])
-            new_nodes.extend(results)
-    return new_nodes
+    Walks each text once with finditer, so the cost is linear in the number
+    of matches and long link lists do not recurse.
 
+    Args:
+        old_nodes: List of TextNode objects
+        pattern: Compiled pattern capturing the text and the URL
+        text_type: TextType of the nodes created for the matches
 
-def split_nodes_link(old_nodes):
+    Returns:
+        List of TextNode objects
+    """
     new_nodes = []
 
     for node in old_nodes:
         if node.text_type is not TextType.TEXT:
-            new_nodes.extend([node])
-            continue
-        link_list = extract_markdown_links(node.text)
-        if len(link_list) == 0:
-            new_nodes.extend([node])
+            new_nodes.append(node)
             continue
-        first_link = link_list[0]
-        link_markdown = f"[{first_link[0]}]({first_link[1]})"
-        parts = node.text.split(link_markdown, 1)
+        text = node.text
+        position = 0
+        for match in pattern.finditer(text):
+            start = match.start()
+            if start > position:
+                new_nodes.append(TextNode(text[position:start], TextType.TEXT))
+            new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            position = match.end()
+
+        if position == 0:
+            # No matches, keep the original node
+            new_nodes.append(node)
+        elif position < len(text):
+            new_nodes.append(TextNode(text[position:], TextType.TEXT))
+    return new_nodes
 
-        if parts[0]:
-            new_nodes.extend([TextNode(parts[0], TextType.TEXT)])
 
-        new_nodes.extend([TextNode(first_link[0], TextType.LINK, first_link[1])])
+def text_to_textnodes(text):
+    """
+    Convert inline markdown to a list of TextNodes in one left-to-right walk.
 
-        if parts[1]:
-            results = split_nodes_link([TextNode(parts[1], TextType.TEXT)])
-            new_nodes.extend(results)
-    return new_nodes
+    Produces the same nodes as running split_nodes_delimiter for code, bold
+    and both italics, then split_nodes_image and split_nodes_link, without
+    building an intermediate node list for every pass.
 
+    Args:
+        text: String containing inline markdown
 
-def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    # inline code first
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    # bold
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    # italic
-    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    # images
-    nodes = split_nodes_image(nodes)
-    # lastly, links
-    nodes = split_nodes_link(nodes)
+    Returns:
+        List of TextNode objects
 
+    Raises:
+        ValueError: If a delimiter is not closed
+    """
+    if not text:
+        return [TextNode(text, TextType.TEXT)]
+    nodes = []
+    scan_inline_delimiters(text, 0, len(text), 0, nodes)
     return nodes
 
 
+def scan_inline_delimiters(text, start, end, level, nodes):
+    # Text outside the delimiters of one level is scanned for the next level,
+    # so a span of higher precedence (e.g. code) hides lower level delimiters
+    if level == len(INLINE_DELIMITERS):
+        scan_inline_images(text[start:end], nodes)
+        return
+
+    delimiter, text_type = INLINE_DELIMITERS[level]
+    size = len(delimiter)
+    position = start
+    while True:
+        opening = text.find(delimiter, position, end)
+        if opening == -1:
+            break
+        closing = text.find(delimiter, opening + size, end)
+        if closing == -1:
+            raise ValueError("Invalid markdown: unclosed delimiter")
+
+        if opening > position:
+            scan_inline_delimiters(text, position, opening, level + 1, nodes)
+        if closing > opening + size:
+            nodes.append(TextNode(text[opening + size : closing], text_type))
+        position = closing + size
+
+    if position < end:
+        scan_inline_delimiters(text, position, end, level + 1, nodes)
+
+
+def scan_inline_images(text, nodes):
+    position = 0
+    for match in IMAGE_PATTERN.finditer(text):
+        if match.start() > position:
+            scan_inline_links(text[position : match.start()], nodes)
+        nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+        position = match.end()
+    if position < len(text):
+        scan_inline_links(text[position:], nodes)
+
+
+def scan_inline_links(text, nodes):
+    position = 0
+    for match in LINK_PATTERN.finditer(text):
+        if match.start() > position:
+            nodes.append(TextNode(text[position : match.start()], TextType.TEXT))
+        nodes.append(TextNode(match.group(1), TextType.LINK, match.group(2)))
+        position = match.end()
+    if position < len(text):
+        nodes.append(TextNode(text[position:], TextType.TEXT))
+
+
 def markdown_to_blocks(markdown):
     if not markdown:
         return []
@@ -347,6 +966,35 @@ def markdown_to_blocks(markdown):
     return cleaned_blocks
 
 
+def iter_markdown_blocks(lines):
+    """
+    Yield the blocks of a markdown document as they complete.
+
+    Gives the same blocks as markdown_to_blocks on the joined lines: every
+    empty line ends a block, and blocks are stripped and skipped if empty.
+    Only the lines of the current block are kept in memory.
+
+    Args:
+        lines: Iterable of lines ending in "\\n", such as an open text file
+
+    Yields:
+        Stripped, non-empty block strings
+    """
+    block_lines = []
+    for line in lines:
+        if line == "\n":
+            block = "".join(block_lines).strip()
+            if block:
+                yield block
+            block_lines = []
+        else:
+            block_lines.append(line)
+
+    block = "".join(block_lines).strip()
+    if block:
+        yield block
+
+
 def strip_numbered_prefix(block):
     return re.sub(r"^\d+\.\s*", "", block)
 
@@ -409,23 +1057,23 @@ def count_leading_hashes(block):
     return count
 
 
-def text_to_child_nodes(text):
+def text_to_child_nodes(text, urls=None):
     # Convert text with inline markdown to list of HTMLNodes
     text_nodes = text_to_textnodes(text)
     children = []
     for text_node in text_nodes:
-        html_node = text_node_to_html_node(text_node)
+        html_node = text_node_to_html_node(text_node, urls)
         children.append(html_node)
     return children
 
 
-def paragraph_to_html_node(block):
+def paragraph_to_html_node(block, urls=None):
     # Process inline markdown in paragraph
-    children = text_to_child_nodes(block)
+    children = text_to_child_nodes(block, urls)
     return ParentNode("p", children)
 
 
-def heading_to_html_node(block):
+def heading_to_html_node(block, urls=None):
     # Extract heading level (count # chars)
     level = count_leading_hashes(block)
 
@@ -433,7 +1081,7 @@ def heading_to_html_node(block):
     text = strip_heading_prefix(block)
 
     # Process inline markdown
-    children = text_to_child_nodes(text)
+    children = text_to_child_nodes(text, urls)
 
     # Return h1-h6 tag
     return ParentNode(f"h{level}", children)
@@ -449,93 +1097,179 @@ def code_to_html_node(block):
     return ParentNode("pre", [code_node])
 
 
-def quote_to_html_node(block):
-    # Split into lines
-    lines = split_into_lines(block)
-
-    # Strip '>' from each line and join
-    text = join_lines_without_prefix(lines, ">")
+def quote_to_html_node(block, lines=None, urls=None):
+    if lines is None:
+        # Split into lines and strip '>' from each
+        lines = split_into_lines(block)
+        text = join_lines_without_prefix(lines, ">")
+    else:
+        # Lines already stripped by classify_block
+        text = " ".join(lines)
 
     # Process inline markdown in quote
-    children = text_to_child_nodes(text)
+    children = text_to_child_nodes(text, urls)
 
     return ParentNode("blockquote", children)
 
 
-def unordered_list_to_html_node(block):
-    # Split into lines
-    lines = split_into_lines(block)
+def unordered_list_to_html_node(block, items=None, urls=None):
+    if items is None:
+        # Split into lines and strip "* " or "- " prefix
+        items = [strip_list_prefix(line) for line in split_into_lines(block)]
 
-    # Create list items
-    list_items = []
-    for line in lines:
-        # Strip "* " or "- " prefix
-        text = strip_list_prefix(line)
-
-        # Process inline markdown in list item
-        children = text_to_child_nodes(text)
+    return list_items_to_html_node("ul", items, urls)
 
-        li_node = ParentNode("li", children)
-        list_items.append(li_node)
 
-    return ParentNode("ul", list_items)
+def ordered_list_to_html_node(block, items=None, urls=None):
+    if items is None:
+        # Split into lines and strip "1. ", "2. ", etc. prefix
+        items = [strip_numbered_prefix(line) for line in split_into_lines(block)]
 
+    return list_items_to_html_node("ol", items, urls)
 
-def ordered_list_to_html_node(block):
-    # Split into lines
-    lines = split_into_lines(block)
 
+def list_items_to_html_node(tag, items, urls=None):
     # Create list items
     list_items = []
-    for line in lines:
-        # Strip "1. ", "2. ", etc. prefix
-        text = strip_numbered_prefix(line)
-
+    for text in items:
         # Process inline markdown in list item
-        children = text_to_child_nodes(text)
+        children = text_to_child_nodes(text, urls)
 
         li_node = ParentNode("li", children)
         list_items.append(li_node)
 
-    return ParentNode("ol", list_items)
+    return ParentNode(tag, list_items)
 
 
-def markdown_to_html_node(markdown):
+def markdown_to_html_node(markdown, cache=None, urls=None):
     """
     Converts a markdown document into a single parent HTMLNode.
 
     Args:
         markdown: String containing markdown document
+        cache: Optional BlockCache reusing blocks rendered for earlier pages
+        urls: Optional UrlRewriter applied to link and image URLs
 
     Returns:
         ParentNode with tag='div' containing child nodes for each block
     """
+    return parse_document(markdown, cache, urls).node
+
+
+def parse_document(markdown, cache=None, urls=None, collect_terms=False):
+    """
+    Parse a markdown document into its node tree and metadata in one pass.
+
+    Args:
+        markdown: String containing markdown document, or an iterable of its
+            lines such as an open file, which is split into blocks lazily
+        cache: Optional BlockCache reusing blocks rendered for earlier pages
+        urls: Optional UrlRewriter applied to link and image URLs
+        collect_terms: Also count the search terms of the text
+
+    Returns:
+        Document with the node tree, title, heading outline and block count
+    """
     # Split markdown into blocks
-    blocks = markdown_to_blocks(markdown)
+    if isinstance(markdown, str):
+        blocks = markdown_to_blocks(markdown)
+    else:
+        blocks = iter_markdown_blocks(markdown)
 
-    # Create list to hold child nodes for each block
+    document = Document(None, terms={} if collect_terms else None)
     block_children = []
+    for block in blocks:
+        block_children.append(block_to_html_node(block, document, cache, urls))
+
+    # Parent div containing all blocks
+    document.node = ParentNode("div", block_children)
+    return document
+
+
+def stream_document(lines, cache=None, urls=None, collect_terms=False):
+    """
+    Parse a markdown document while it is being rendered.
 
-    # Process each block
+    Blocks are read only up to the first h1, so the title is known before
+    the page is written. The remaining blocks are parsed one at a time as
+    the node is rendered, so the whole document is never held in memory.
+
+    Args:
+        lines: Iterable of the document's lines, such as an open file
+        cache: Optional BlockCache reusing blocks rendered for earlier pages
+        urls: Optional UrlRewriter applied to link and image URLs
+        collect_terms: Also count the search terms of the text
+
+    Returns:
+        Document whose node can be rendered once; its heading outline, block
+        count and terms are complete only after the node has been rendered
+    """
+    blocks = iter_markdown_blocks(lines)
+    document = Document(None, terms={} if collect_terms else None)
+    leading_children = []
     for block in blocks:
-        # Determine block type
-        block_type = block_to_block_type(block)
-
-        # Convert block to HTMLNode based on type
-        if block_type == BlockType.PARAGRAPH:
-            child_node = paragraph_to_html_node(block)
-        elif block_type == BlockType.HEADING:
-            child_node = heading_to_html_node(block)
-        elif block_type == BlockType.CODE:
-            child_node = code_to_html_node(block)
-        elif block_type == BlockType.QUOTE:
-            child_node = quote_to_html_node(block)
-        elif block_type == BlockType.UNORDERED_LIST:
-            child_node = unordered_list_to_html_node(block)
-        elif block_type == BlockType.ORDERED_LIST:
-            child_node = ordered_list_to_html_node(block)
-
-        block_children.append(child_node)
-
-    # Return parent div containing all blocks
-    return ParentNode("div", block_children)
+        leading_children.append(block_to_html_node(block, document, cache, urls))
+        if document.title is not None:
+            break
+
+    remaining_children = (
+        block_to_html_node(block, document, cache, urls) for block in blocks
+    )
+    document.node = ParentNode("div", chain(leading_children, remaining_children))
+    return document
+
+
+def block_to_html_node(block, document, cache=None, urls=None):
+    """
+    Convert one block to an HTMLNode, recording its metadata in a Document.
+
+    Args:
+        block: String containing one markdown block
+        document: Document collecting the title, headings, block count and
+            search terms
+        cache: Optional BlockCache reusing blocks rendered for earlier pages
+        urls: Optional UrlRewriter applied to link and image URLs
+
+    Returns:
+        HTMLNode for the block
+    """
+    # Determine block type, keeping the lines split along the way
+    block_type, lines = classify_block(block)
+    document.block_count += 1
+
+    # Collect the outline; the title is the first h1, as in extract_title
+    if block_type == BlockType.HEADING:
+        level = count_leading_hashes(block)
+        text = strip_heading_prefix(block)
+        document.headings.append((level, text))
+        if level == 1 and document.title is None:
+            document.title = text
+
+    if cache is None:
+        child_node = convert_block(block, block_type, lines, urls)
+    else:
+        cache_key = (block_type, block, None if urls is None else urls.key)
+        child_node = cache.get(cache_key)
+        if child_node is None:
+            child_node = convert_block(block, block_type, lines, urls)
+            cache.put(cache_key, child_node)
+
+    if document.terms is not None:
+        add_node_terms(document.terms, child_node)
+    return child_node
+
+
+def convert_block(block, block_type, lines=None, urls=None):
+    # Convert block to HTMLNode based on type
+    if block_type == BlockType.PARAGRAPH:
+        return paragraph_to_html_node(block, urls)
+    elif block_type == BlockType.HEADING:
+        return heading_to_html_node(block, urls)
+    elif block_type == BlockType.CODE:
+        return code_to_html_node(block)
+    elif block_type == BlockType.QUOTE:
+        return quote_to_html_node(block, lines, urls)
+    elif block_type == BlockType.UNORDERED_LIST:
+        return unordered_list_to_html_node(block, lines, urls)
+    elif block_type == BlockType.ORDERED_LIST:
+        return ordered_list_to_html_node(block, lines, urls)